@@ -1,4 +1,20 @@
+import array
+import asyncio
+import concurrent.futures
+import contextlib
+import io
+import math
+import operator
+import os
+import random
+import threading
 import time
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него работает array.array
+    np = None
 
 
 def sync_calculate(operation, a, b, delay):
@@ -16,21 +32,331 @@ def sync_calculate(operation, a, b, delay):
     print(f"Начало операции {a} {operation} {b}")
     time.sleep(delay)  # Имитация долгого вычисления
 
+    result = apply_operation(operation, a, b)
+
+    print(f"Конец операции {a} {operation} {b} = {result}")
+    return result
+
+
+async def async_calculate(operation, a, b, delay):
+    """
+    Асинхронный вариант sync_calculate: задержка не блокирует цикл событий
+    """
+    print(f"Начало операции {a} {operation} {b}")
+    await asyncio.sleep(delay)  # Имитация долгого вычисления
+
+    result = apply_operation(operation, a, b)
+
+    print(f"Конец операции {a} {operation} {b} = {result}")
+    return result
+
+
+def apply_operation(operation, a, b):
+    """
+    Вычисляет результат одной операции без задержки
+    """
     if operation == '+':
-        result = a + b
+        return a + b
     elif operation == '-':
-        result = a - b
+        return a - b
     elif operation == '*':
-        result = a * b
+        return a * b
     elif operation == '/':
-        result = a / b if b != 0 else 'Ошибка: деление на ноль'
+        return a / b if b != 0 else 'Ошибка: деление на ноль'
     else:
-        result = 'Неизвестная операция'
+        return 'Неизвестная операция'
 
-    print(f"Конец операции {a} {operation} {b} = {result}")
+
+# Скалярные функции для пакетного режима без NumPy
+BATCH_OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': lambda x, y: x / y if y != 0 else math.nan,
+}
+
+
+def batch_calculate(operations, a, b):
+    """
+    Выполняет операции над столбцами чисел пакетно (без задержки)
+
+    Операции группируются по оператору, и каждая группа вычисляется
+    за один векторный проход. Деление на ноль и неизвестная операция
+    дают NaN вместо строки с ошибкой.
+
+    Параметры:
+    operations (sequence[str]): столбец операций ('+', '-', '*', '/')
+    a, b (sequence[float]): столбцы операндов (numpy.ndarray, array.array, list)
+
+    Возвращает:
+    numpy.ndarray или array.array('d'): результаты в порядке входа
+    """
+    if not (len(operations) == len(a) == len(b)):
+        raise ValueError("Столбцы операций и операндов должны быть одной длины")
+
+    if np is not None:
+        ops = np.asarray(operations)
+        left = np.asarray(a, dtype=np.float64)
+        right = np.asarray(b, dtype=np.float64)
+        result = np.full(len(ops), np.nan)
+
+        for op in np.unique(ops):
+            mask = ops == op
+            x, y = left[mask], right[mask]
+            if op == '+':
+                result[mask] = x + y
+            elif op == '-':
+                result[mask] = x - y
+            elif op == '*':
+                result[mask] = x * y
+            elif op == '/':
+                result[mask] = np.where(y != 0, x / np.where(y != 0, y, 1), np.nan)
+        return result
+
+    # Запасной путь: группируем индексы по оператору и считаем каждую группу одним проходом
+    groups = {}
+    for i, op in enumerate(operations):
+        groups.setdefault(op, []).append(i)
+
+    result = array.array('d', [math.nan]) * len(operations)
+    for op, indices in groups.items():
+        func = BATCH_OPERATIONS.get(op)
+        if func is None:
+            continue
+        for i, value in zip(indices, map(func, [a[i] for i in indices], [b[i] for i in indices])):
+            result[i] = value
     return result
 
 
+def benchmark_batch_calculate(n=100000):
+    """
+    Сравнивает пропускную способность пакетного режима с поштучными вызовами
+    sync_calculate (задержка 0, вывод подавлен)
+    """
+    ops_cycle = ['+', '-', '*', '/']
+    operations = [ops_cycle[i % 4] for i in range(n)]
+    a = array.array('d', (float(i) for i in range(n)))
+    b = array.array('d', (float(i % 7) for i in range(n)))  # есть деления на ноль
+
+    print(f"\n=== БЕНЧМАРК ПАКЕТНОГО РЕЖИМА ({n} операций) ===")
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loop_results = [sync_calculate(op, x, y, 0) for op, x, y in zip(operations, a, b)]
+    loop_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    batch_results = batch_calculate(operations, a, b)
+    batch_time = time.perf_counter() - start_time
+
+    # Сверяем результаты: строка с ошибкой соответствует NaN
+    mismatches = 0
+    for expected, actual in zip(loop_results, batch_results):
+        if isinstance(expected, str):
+            mismatches += not math.isnan(actual)
+        elif expected != actual:
+            mismatches += 1
+
+    backend = "NumPy" if np is not None else "array.array"
+    print(f"Поштучный цикл: {loop_time:.3f} сек ({n / loop_time:,.0f} оп/сек)")
+    print(f"Пакетный режим ({backend}): {batch_time:.3f} сек ({n / batch_time:,.0f} оп/сек)")
+    print(f"Ускорение: {loop_time / batch_time:.2f}x")
+    print(f"Расхождений: {mismatches}")
+    return loop_time, batch_time
+
+
+class CalculationCache:
+    """
+    Кэш результатов sync_calculate с вытеснением LRU и необязательным TTL
+
+    Ключ - тройка (operation, a, b); задержка в ключ не входит.
+    Одновременные запросы одного ключа ждут единственного вычисления.
+
+    Параметры:
+    max_size (int): максимальное число хранимых результатов
+    ttl (float): время жизни записи в секундах (None - без ограничения)
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        if max_size < 1:
+            raise ValueError("max_size должен быть положительным")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ключ -> (результат, момент записи)
+        self._in_flight = {}  # ключ -> Future текущего вычисления
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def calculate(self, operation, a, b, delay):
+        """
+        Возвращает результат из кэша или вычисляет его через sync_calculate
+        """
+        key = (operation, a, b)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.expirations += 1
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = sync_calculate(operation, a, b, delay)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        """Удаляет все записи (счетчики сохраняются)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Возвращает счетчики попаданий, промахов и вытеснений
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0,
+            }
+
+
+def benchmark_calculation_cache(n=2000, distinct=50, delay=0.01, max_workers=16):
+    """
+    Сравнивает выполнение повторяющихся операций с кэшем и без него
+    """
+    rng = random.Random(42)
+    keys = [(rng.choice('+-*/'), rng.randint(0, 9), rng.randint(0, 9)) for _ in range(distinct)]
+    jobs = [rng.choice(keys) + (delay,) for _ in range(n)]
+
+    print(f"\n=== БЕНЧМАРК КЭША ({n} операций, {distinct} уникальных) ===")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        plain_results, plain_stats = concurrent_calculate(jobs, max_workers=max_workers)
+        cache = CalculationCache(max_size=distinct // 2)
+        cached_results, cached_stats = concurrent_calculate(jobs, max_workers=max_workers, cache=cache)
+
+    print(f"Без кэша: {plain_stats['makespan']:.2f} сек")
+    print(f"С кэшем: {cached_stats['makespan']:.2f} сек")
+    print(f"Результаты совпадают: {plain_results == cached_results}")
+    print(f"Статистика кэша: {cache.stats()}")
+    return cache.stats()
+
+
+# Размер пула потоков по умолчанию, как у ThreadPoolExecutor: не поток на задачу
+DEFAULT_THREAD_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def concurrent_calculate(jobs, backend='thread', max_workers=None, cache=None):
+    """
+    Выполняет набор операций конкурентно
+
+    Задачи запускаются в порядке убывания задержки (сначала самые долгие),
+    чтобы общее время было близко к максимальной задержке.
+
+    Параметры:
+    jobs (list): список кортежей (operation, a, b, delay)
+    backend (str): 'thread' - пул потоков, 'asyncio' - цикл событий
+    max_workers (int): ограничение одновременных операций; по умолчанию для
+        'thread' - DEFAULT_THREAD_WORKERS потоков, для 'asyncio' - все сразу
+    cache (CalculationCache): необязательный кэш результатов (только для 'thread')
+
+    Возвращает:
+    tuple: (результаты в порядке входа, словарь со статистикой времени)
+    """
+    if backend not in ('thread', 'asyncio'):
+        raise ValueError(f"Неизвестный backend: {backend}")
+    if cache is not None and backend != 'thread':
+        raise ValueError("Кэш поддерживается только для backend='thread'")
+
+    if max_workers is not None:
+        workers = max_workers
+    elif backend == 'thread':
+        workers = DEFAULT_THREAD_WORKERS
+    else:
+        workers = max(len(jobs), 1)
+    # Индексы задач от самой долгой к самой короткой
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i][3], reverse=True)
+    results = [None] * len(jobs)
+
+    start_time = time.perf_counter()
+
+    if backend == 'thread':
+        calculate = cache.calculate if cache is not None else sync_calculate
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(calculate, *jobs[i]): i for i in order}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+    else:
+        async def run_all():
+            semaphore = asyncio.Semaphore(workers)
+
+            async def run_one(i):
+                async with semaphore:
+                    results[i] = await async_calculate(*jobs[i])
+
+            await asyncio.gather(*(run_one(i) for i in order))
+
+        asyncio.run(run_all())
+
+    makespan = time.perf_counter() - start_time
+
+    # Нижняя граница: ни одна схема не быстрее самой долгой задачи
+    # и не быстрее идеального распределения суммарной работы
+    delays = [job[3] for job in jobs]
+    lower_bound = max(max(delays, default=0), sum(delays) / max(1, min(workers, len(jobs))))
+    stats = {
+        "backend": backend,
+        "workers": workers,
+        "makespan": makespan,
+        "lower_bound": lower_bound,
+        "sequential_time": sum(delays),
+        "efficiency": lower_bound / makespan if makespan > 0 else 0,
+    }
+    return results, stats
+
+
 def task1_sync_calculations():
     """
     Задача: Выполните последовательно 4 операции и измерьте общее время выполнения.
@@ -70,5 +396,33 @@ def task1_sync_calculations():
     print(f"Общее время выполнения: {end_time - start_time:.2f} секунд")
     print(f"Результаты: {results}")
 
+
+def task1_concurrent_calculations(backend='thread', max_workers=None):
+    """
+    Выполняет те же 4 операции конкурентно и сравнивает время с нижней границей
+    """
+    jobs = [
+        ('+', 15, 25, 2),
+        ('-', 40, 18, 1),
+        ('*', 12, 8, 3),
+        ('/', 100, 5, 1),
+    ]
+
+    print(f"\n=== КОНКУРЕНТНОЕ ВЫПОЛНЕНИЕ ({backend}) ===")
+    results, stats = concurrent_calculate(jobs, backend=backend, max_workers=max_workers)
+
+    print(f"Общее время выполнения: {stats['makespan']:.2f} секунд")
+    print(f"Теоретическая нижняя граница: {stats['lower_bound']:.2f} секунд")
+    print(f"Последовательное время: {stats['sequential_time']:.2f} секунд")
+    print(f"Эффективность: {stats['efficiency'] * 100:.1f}%")
+    print(f"Результаты: {results}")
+    return results, stats
+
+
 # Запуск задачи
-task1_sync_calculations()
+if __name__ == "__main__":
+    task1_sync_calculations()
+    task1_concurrent_calculations('thread')
+    task1_concurrent_calculations('asyncio', max_workers=2)
+    benchmark_calculation_cache()
+    benchmark_batch_calculate()
@@ -1,26 +1,881 @@
+import asyncio
+import concurrent.futures
+import functools
+import http.server
+import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import tempfile
 import threading
 import time
 import random
+import urllib.request
 
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:  # нужен только для реальных загрузок в backend='asyncio'
+    aiohttp = None
+    web = None
 
-def download_file(filename, size):
+try:
+    import resource
+except ImportError:  # нет на Windows: пиковая память не измеряется
+    resource = None
+
+
+# Размер фрагмента потоковой загрузки по умолчанию
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Размер сегмента при параллельной загрузке по диапазонам
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+
+
+def download_file(filename, size, url=None, dest_dir=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  throttle=None, verbose=True):
     """
-    Имитирует загрузку файла
+    Имитирует загрузку файла или, если передан url, реально загружает его
 
     Параметры:
     filename (str): имя файла
     size (int): размер файла в МБ
+    url (str): источник (http:// или file://); None - имитация задержкой
+    dest_dir (str): каталог для сохранения (по умолчанию текущий)
+    chunk_size (int): размер фрагмента потоковой загрузки в байтах
+    throttle (callable): throttle(байт) вызывается на каждый фрагмент (например, TokenBucket.consume)
+    verbose (bool): печатать ли начало, прогресс и завершение загрузки
     """
+    if url is not None:
+        dest_path = os.path.join(dest_dir or os.getcwd(), filename)
+        if verbose:
+            print(f"Начало загрузки {filename} ({size} МБ)")
+        stream_download(url, dest_path, chunk_size=chunk_size, throttle=throttle,
+                        progress=make_progress_printer(filename) if verbose else None)
+        if verbose:
+            print(f"Завершена загрузка {filename}")
+        return dest_path
+
     download_time = size * 0.1  # 0.1 сек на МБ
-    print(f"Начало загрузки {filename} ({size} МБ)")
+    if verbose:
+        print(f"Начало загрузки {filename} ({size} МБ)")
 
     # Имитация прогресса загрузки
     for i in range(5):
         time.sleep(download_time / 5)
+        if throttle is not None:
+            throttle(size * 1024 * 1024 / 5)
         progress = (i + 1) * 20
-        print(f"{filename}: {progress}% загружено")
+        if verbose:
+            print(f"{filename}: {progress}% загружено")
+
+    if verbose:
+        print(f"Завершена загрузка {filename}")
+
+
+async def async_download_file(session, filename, size, url=None, dest_dir=None,
+                              chunk_size=DEFAULT_CHUNK_SIZE, throttle=None, verbose=True):
+    """
+    Асинхронный вариант download_file с тем же набором параметров
+
+    Параметры:
+    session (aiohttp.ClientSession): сессия с общим пулом соединений (None - только имитация)
+    throttle (coroutine function): await throttle(байт) на каждый фрагмент
+    остальные параметры - как у download_file
+    """
+    if url is not None:
+        dest_path = os.path.join(dest_dir or os.getcwd(), filename)
+        if verbose:
+            print(f"Начало загрузки {filename} ({size} МБ)")
+        async with session.get(url) as response:
+            response.raise_for_status()
+            # Файловые операции блокируют, поэтому выносим их в поток
+            out = await asyncio.to_thread(open, dest_path, "wb")
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await asyncio.to_thread(out.write, chunk)
+                    if throttle is not None:
+                        await throttle(len(chunk))
+            finally:
+                await asyncio.to_thread(out.close)
+        if verbose:
+            print(f"Завершена загрузка {filename}")
+        return dest_path
+
+    download_time = size * 0.1  # 0.1 сек на МБ
+    if verbose:
+        print(f"Начало загрузки {filename} ({size} МБ)")
+
+    for i in range(5):
+        await asyncio.sleep(download_time / 5)
+        if throttle is not None:
+            await throttle(size * 1024 * 1024 / 5)
+        if verbose:
+            print(f"{filename}: {(i + 1) * 20}% загружено")
+
+    if verbose:
+        print(f"Завершена загрузка {filename}")
+
+
+class TokenBucket:
+    """
+    Ограничитель скорости "ведро токенов", общий для нескольких потоков
+
+    Параметры:
+    rate (float): скорость пополнения в байтах в секунду
+    capacity (float): максимальный запас токенов (по умолчанию - секунда трафика)
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate должен быть положительным")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """
+        Забирает amount токенов и возвращает, сколько секунд нужно подождать
+
+        Запрос больше capacity разрешен: запас уходит в минус, и следующие
+        потребители ждут, пока долг не будет погашен.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def consume(self, amount):
+        """Забирает amount токенов, при нехватке блокирует поток до их накопления"""
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def consume_async(self, amount):
+        """Забирает amount токенов, при нехватке приостанавливает корутину"""
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def percentile(values, q):
+    """Процентиль q (0-100) по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def pooled_download(files, max_workers=4, order="shortest", bandwidth_limit=None,
+                    verbose=True, backend="thread", connection_limit=100, limit_per_host=0,
+                    **download_kwargs):
+    """
+    Загружает файлы фиксированным пулом исполнителей вместо потока на каждый файл
+
+    Параметры:
+    files (list): список (filename, size в МБ) или (filename, size, url)
+    max_workers (int): число потоков или корутин-исполнителей
+    order (str): 'shortest' - сначала маленькие, 'largest' - сначала большие,
+                 'fifo' - в исходном порядке
+    bandwidth_limit (float): общий лимит скорости в МБ/с (None - без лимита)
+    verbose (bool): печатать строку о завершении каждого файла
+    backend (str): 'thread' - пул потоков, 'asyncio' - корутины в одном потоке
+    connection_limit (int): для 'asyncio' - размер общего пула соединений
+    limit_per_host (int): для 'asyncio' - максимум соединений к одному хосту (0 - без лимита)
+    download_kwargs: дополнительные аргументы download_file (dest_dir, chunk_size и т.д.)
+
+    Возвращает:
+    dict: статистика - общее время, пропускная способность и процентили задержки
+    """
+    if order == "shortest":
+        ordered = sorted(files, key=lambda item: item[1])
+    elif order == "largest":
+        ordered = sorted(files, key=lambda item: item[1], reverse=True)
+    elif order == "fifo":
+        ordered = list(files)
+    else:
+        raise ValueError(f"Неизвестный порядок: {order}")
+    if backend not in ("thread", "asyncio"):
+        raise ValueError(f"Неизвестный backend: {backend}")
+
+    bucket = TokenBucket(bandwidth_limit * 1024 * 1024) if bandwidth_limit else None
+    latencies = []
+    errors = []
+    start_time = time.perf_counter()
+
+    def on_done(filename, size, error=None):
+        # Задержка считается от начала работы пула, т.е. включает ожидание в очереди
+        if error is not None:
+            errors.append((filename, error))
+            print(f"Ошибка при загрузке {filename}: {error}")
+            return
+        latency = time.perf_counter() - start_time
+        latencies.append(latency)
+        if verbose:
+            print(f"Завершена загрузка {filename} ({size} МБ) за {latency:.2f} сек")
+
+    if backend == "thread":
+        jobs = queue.Queue()
+        for item in ordered:
+            jobs.put(item)
+        print_lock = threading.Lock()
+
+        def worker():
+            while True:
+                try:
+                    filename, size, *url = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                error = None
+                try:
+                    download_file(filename, size, *url, throttle=bucket.consume if bucket else None,
+                                  verbose=False, **download_kwargs)
+                except Exception as e:
+                    error = e
+                with print_lock:
+                    on_done(filename, size, error)
+
+        threads = [threading.Thread(target=worker) for _ in range(min(max_workers, len(files)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        asyncio.run(_pooled_download_async(ordered, max_workers, bucket, connection_limit,
+                                           limit_per_host, on_done, download_kwargs))
+
+    total_time = time.perf_counter() - start_time
+    total_mb = sum(item[1] for item in files)
+    return {
+        "backend": backend,
+        "files": len(files),
+        "errors": len(errors),
+        "total_time": total_time,
+        "throughput_mb_s": total_mb / total_time if total_time > 0 else 0,
+        "latency_mean": sum(latencies) / len(latencies) if latencies else 0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+    }
+
+
+async def _pooled_download_async(ordered, max_workers, bucket, connection_limit, limit_per_host,
+                                 on_done, download_kwargs):
+    """
+    Асинхронная часть pooled_download: корутины-исполнители над общей очередью
+
+    Соединения переиспользуются через один aiohttp.TCPConnector, размер
+    которого ограничен connection_limit (и limit_per_host на каждый хост).
+    """
+    jobs = asyncio.Queue()
+    for item in ordered:
+        jobs.put_nowait(item)
+
+    session = None
+    if any(len(item) > 2 for item in ordered):
+        if aiohttp is None:
+            raise RuntimeError("Для загрузки по url в backend='asyncio' требуется aiohttp")
+        connector = aiohttp.TCPConnector(limit=connection_limit, limit_per_host=limit_per_host)
+        session = aiohttp.ClientSession(connector=connector)
+
+    async def worker():
+        while True:
+            try:
+                filename, size, *url = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            error = None
+            try:
+                await async_download_file(session, filename, size, *url,
+                                          throttle=bucket.consume_async if bucket else None,
+                                          verbose=False, **download_kwargs)
+            except Exception as e:
+                error = e
+            on_done(filename, size, error)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(max_workers, len(ordered)))))
+    finally:
+        if session is not None:
+            await session.close()
+
+
+def make_progress_printer(filename):
+    """
+    Создает функцию обратного вызова, печатающую прогресс загрузки
+    """
+    def on_progress(done, total):
+        if total:
+            print(f"{filename}: {done * 100 // total}% загружено")
+        else:
+            print(f"{filename}: {done / (1024 * 1024):.1f} МБ загружено")
+    return on_progress
+
+
+def stream_download(url, dest_path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                    progress_interval=0.5, throttle=None):
+    """
+    Потоково загружает источник на диск фрагментами фиксированного размера
+
+    Данные читаются в один заранее выделенный bytearray через memoryview,
+    поэтому потребление памяти не зависит от размера файла.
+
+    Параметры:
+    url (str): источник (http://, https:// или file://)
+    dest_path (str): путь для сохранения
+    chunk_size (int): размер фрагмента в байтах
+    progress (callable): progress(загружено_байт, всего_байт или None)
+    progress_interval (float): минимальный интервал между вызовами progress в секундах
+    throttle (callable): throttle(байт) вызывается после каждого фрагмента
+
+    Возвращает:
+    int: число загруженных байт
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    done = 0
+    last_report = time.monotonic()
+
+    with urllib.request.urlopen(url) as response, open(dest_path, "wb") as out:
+        length = response.headers.get("Content-Length")
+        total = int(length) if length is not None else None
+
+        while True:
+            n = response.readinto(view)
+            if not n:
+                break
+            out.write(view[:n])
+            done += n
+            if throttle is not None:
+                throttle(n)
+
+            if progress is not None:
+                now = time.monotonic()
+                if now - last_report >= progress_interval:
+                    last_report = now
+                    progress(done, total)
+
+    if progress is not None:
+        progress(done, total)
+    return done
+
+
+def probe_url(url):
+    """
+    Узнает размер источника и поддержку запросов по диапазонам (HEAD-запрос)
+
+    Возвращает:
+    tuple: (размер в байтах или None, поддерживаются ли диапазоны)
+    """
+    request = urllib.request.Request(url, method="HEAD")
+    with urllib.request.urlopen(request) as response:
+        length = response.headers.get("Content-Length")
+        accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return (int(length) if length is not None else None), accepts_ranges
+
+
+def _write_at(fd, data, offset, lock):
+    """Записывает данные в файл по смещению (pwrite или seek+write под блокировкой)"""
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+    else:
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                data = data[os.write(fd, data):]
+
+
+def fetch_segment(url, fd, start, end, buffer, lock):
+    """
+    Загружает байты [start, end] источника и пишет их в файл по тем же смещениям
+
+    Параметры:
+    url (str): источник, поддерживающий Range
+    fd (int): дескриптор заранее выделенного файла
+    start, end (int): границы диапазона включительно
+    buffer (bytearray): переиспользуемый буфер потока
+    lock (threading.Lock): блокировка для платформ без os.pwrite
+    """
+    request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+    view = memoryview(buffer)
+    offset = start
+
+    with urllib.request.urlopen(request) as response:
+        if response.status != 206:
+            raise IOError(f"Сервер не вернул диапазон {start}-{end} (статус {response.status})")
+        while offset <= end:
+            n = response.readinto(view[:min(len(view), end - offset + 1)])
+            if not n:
+                break
+            _write_at(fd, view[:n], offset, lock)
+            offset += n
+
+    if offset != end + 1:
+        raise IOError(f"Сегмент {start}-{end} получен не полностью ({offset - start} байт)")
+
+
+def _load_segment_state(state_path, total, segment_size):
+    """Читает номера уже загруженных сегментов, если состояние совпадает с текущим планом"""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if state.get("size") != total or state.get("segment_size") != segment_size:
+        return set()
+    return set(state.get("done", []))
+
+
+def _save_segment_state(state_path, total, segment_size, done):
+    """Атомарно сохраняет номера загруженных сегментов"""
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"size": total, "segment_size": segment_size, "done": sorted(done)}, f)
+    os.replace(tmp_path, state_path)
+
+
+def segmented_download_many(downloads, max_workers=8, segment_size=DEFAULT_SEGMENT_SIZE,
+                            chunk_size=DEFAULT_CHUNK_SIZE, retries=3):
+    """
+    Загружает несколько файлов, разбивая каждый на диапазоны байт
+
+    Сегменты всех файлов выполняются общим ограниченным пулом потоков и
+    пишутся сразу в заранее выделенные файлы по своим смещениям. Номера
+    готовых сегментов сохраняются в файл <dest_path>.segments, поэтому
+    после ошибки повторный вызов докачивает только недостающие сегменты.
+    Источники без поддержки Range загружаются одним потоком.
+
+    Параметры:
+    downloads (list): список пар (url, dest_path)
+    max_workers (int): размер пула потоков
+    segment_size (int): размер сегмента в байтах
+    chunk_size (int): размер буфера чтения каждого потока
+    retries (int): число повторных попыток для сегмента
+
+    Возвращает:
+    dict: dest_path -> число байт
+    """
+    local = threading.local()
+    write_lock = threading.Lock()
+    state_lock = threading.Lock()
+
+    def get_buffer():
+        if not hasattr(local, "buffer"):
+            local.buffer = bytearray(chunk_size)
+        return local.buffer
+
+    def run_segment(plan, index):
+        start = index * segment_size
+        end = min(start + segment_size, plan["size"]) - 1
+        for attempt in range(retries + 1):
+            try:
+                fetch_segment(plan["url"], plan["fd"], start, end, get_buffer(), write_lock)
+                break
+            except OSError:
+                if attempt == retries:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+        with state_lock:
+            plan["done"].add(index)
+            _save_segment_state(plan["state_path"], plan["size"], segment_size, plan["done"])
+
+    plans = []
+    sizes = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for url, dest_path in downloads:
+                total, accepts_ranges = probe_url(url)
+                if total is None or not accepts_ranges:
+                    futures[executor.submit(stream_download, url, dest_path, chunk_size)] = dest_path
+                    continue
+
+                state_path = dest_path + ".segments"
+                done = _load_segment_state(state_path, total, segment_size)
+                if not os.path.exists(dest_path):
+                    done = set()
+                fd = os.open(dest_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+                os.ftruncate(fd, total)  # предвыделяем файл нужного размера
+                plan = {"url": url, "dest_path": dest_path, "fd": fd, "size": total,
+                        "state_path": state_path, "done": done}
+                plans.append(plan)
+                sizes[dest_path] = total
+
+                segment_count = (total + segment_size - 1) // segment_size
+                for index in range(segment_count):
+                    if index not in done:
+                        futures[executor.submit(run_segment, plan, index)] = dest_path
+
+            failed = []
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    result = future.result()
+                except OSError as e:
+                    failed.append((futures[future], e))
+                    continue
+                if isinstance(result, int):
+                    sizes[futures[future]] = result
+    finally:
+        for plan in plans:
+            os.close(plan["fd"])
+
+    if failed:
+        dest_path, error = failed[0]
+        raise IOError(f"Не удалось загрузить {len(failed)} сегм.; повторный вызов докачает их "
+                      f"(первая ошибка в {dest_path}: {error})")
+
+    for plan in plans:
+        if os.path.exists(plan["state_path"]):
+            os.remove(plan["state_path"])
+    return sizes
+
+
+def segmented_download(url, dest_path, **kwargs):
+    """
+    Загружает один файл параллельными диапазонами (см. segmented_download_many)
+    """
+    return segmented_download_many([(url, dest_path)], **kwargs)[dest_path]
+
+
+def start_file_server(directory, handler_class=http.server.SimpleHTTPRequestHandler):
+    """
+    Запускает локальный HTTP-сервер для каталога в фоновом потоке
+
+    Возвращает:
+    tuple: (сервер, базовый URL); остановка - server.shutdown()
+    """
+    class QuietHandler(handler_class):
+        def log_message(self, format, *args):
+            pass
+
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Обработчик статических файлов с поддержкой заголовка Range
+
+    Атрибут bytes_per_second ограничивает скорость каждого соединения,
+    что позволяет имитировать удаленный сервер на локальной машине.
+    """
+    bytes_per_second = None
+    range_pattern = re.compile(r"bytes=(\d*)-(\d*)$")
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def do_GET(self):
+        match = self.range_pattern.match(self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            f = self.send_head()
+            if f:
+                try:
+                    self.send_body(f)
+                finally:
+                    f.close()
+            return
+
+        size = os.path.getsize(path)
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last or 0), 0), size - 1
+        if start > end or start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
 
-    print(f"Завершена загрузка {filename}")
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        with open(path, "rb") as f:
+            f.seek(start)
+            self.send_body(f, end - start + 1)
+
+    def send_body(self, f, length=None):
+        """Отправляет length байт (None - до конца) из файла с учетом ограничения скорости"""
+        block = 64 * 1024
+        start_time = time.monotonic()
+        sent = 0
+        while length is None or sent < length:
+            data = f.read(block if length is None else min(block, length - sent))
+            if not data:
+                break
+            self.wfile.write(data)
+            sent += len(data)
+            if self.bytes_per_second:
+                delay = sent / self.bytes_per_second - (time.monotonic() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def peak_rss_mb():
+    """Пиковый объем резидентной памяти процесса в МБ (None, если недоступно)"""
+    if resource is None:
+        return None
+    # На Linux ru_maxrss в КБ, на macOS - в байтах
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def benchmark_stream_download(size_mb=2048, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Измеряет скорость потоковой загрузки и пиковую память для большого файла
+
+    Источник - разреженный файл, отдаваемый локальным HTTP-сервером и по file://.
+    """
+    print(f"\n=== БЕНЧМАРК ПОТОКОВОЙ ЗАГРУЗКИ ({size_mb} МБ, фрагмент {chunk_size // 1024} КБ) ===")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = os.path.join(tmp_dir, "source")
+        os.mkdir(source_dir)
+        source_path = os.path.join(source_dir, "big.bin")
+        with open(source_path, "wb") as f:
+            f.truncate(size_mb * 1024 * 1024)
+
+        server, base_url = start_file_server(source_dir)
+        try:
+            sources = [
+                ("HTTP", f"{base_url}/big.bin"),
+                ("file://", "file://" + urllib.request.pathname2url(source_path)),
+            ]
+            rss_before = peak_rss_mb()
+            for label, url in sources:
+                dest_path = os.path.join(tmp_dir, "downloaded.bin")
+                start_time = time.perf_counter()
+                done = stream_download(url, dest_path, chunk_size=chunk_size)
+                elapsed = time.perf_counter() - start_time
+                os.remove(dest_path)
+
+                print(f"{label}: {done / (1024 * 1024):.0f} МБ за {elapsed:.2f} сек "
+                      f"({done / (1024 * 1024) / elapsed:.1f} МБ/с)")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    rss_after = peak_rss_mb()
+    if rss_after is not None:
+        print(f"Пиковая память процесса: {rss_after:.1f} МБ (до загрузки: {rss_before:.1f} МБ)")
+
+
+def benchmark_segmented_download(max_workers=8, segment_size=DEFAULT_SEGMENT_SIZE,
+                                 bytes_per_second=20 * 1024 * 1024):
+    """
+    Сравнивает загрузку по одному потоку на файл с сегментной загрузкой
+
+    Файлы из task2_threaded_downloader отдаются локальным сервером с
+    поддержкой Range и ограничением скорости на соединение.
+    """
+    files = [
+        ("document.pdf", 10),
+        ("image.jpg", 5),
+        ("video.mp4", 20),
+        ("archive.zip", 15)
+    ]
+    print(f"\n=== БЕНЧМАРК СЕГМЕНТНОЙ ЗАГРУЗКИ ({max_workers} потоков, "
+          f"{bytes_per_second // (1024 * 1024)} МБ/с на соединение) ===")
+
+    class ThrottledHandler(RangeRequestHandler):
+        pass
+    ThrottledHandler.bytes_per_second = bytes_per_second
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = os.path.join(tmp_dir, "source")
+        os.mkdir(source_dir)
+        for filename, size in files:
+            with open(os.path.join(source_dir, filename), "wb") as f:
+                f.write(os.urandom(size * 1024 * 1024))
+
+        server, base_url = start_file_server(source_dir, ThrottledHandler)
+        try:
+            # Один поток на файл
+            start_time = time.perf_counter()
+            threads = []
+            for filename, _ in files:
+                thread = threading.Thread(target=stream_download, args=(
+                    f"{base_url}/{filename}", os.path.join(tmp_dir, "single_" + filename)))
+                threads.append(thread)
+                thread.start()
+            for thread in threads:
+                thread.join()
+            single_time = time.perf_counter() - start_time
+
+            # Сегменты всех файлов в общем пуле
+            start_time = time.perf_counter()
+            segmented_download_many(
+                [(f"{base_url}/{filename}", os.path.join(tmp_dir, "segmented_" + filename))
+                 for filename, _ in files],
+                max_workers=max_workers, segment_size=segment_size)
+            segmented_time = time.perf_counter() - start_time
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        identical = True
+        for filename, _ in files:
+            with open(os.path.join(source_dir, filename), "rb") as f:
+                original = f.read()
+            for prefix in ("single_", "segmented_"):
+                with open(os.path.join(tmp_dir, prefix + filename), "rb") as f:
+                    identical = identical and f.read() == original
+
+    print(f"Один поток на файл: {single_time:.2f} сек")
+    print(f"Сегментная загрузка: {segmented_time:.2f} сек")
+    print(f"Ускорение: {single_time / segmented_time:.2f}x")
+    print(f"Содержимое совпадает с источником: {identical}")
+    return single_time, segmented_time
+
+
+def benchmark_pooled_download(n_files=2000, max_workers=32, bandwidth_limit=None):
+    """
+    Сравнивает поток на файл с фиксированным пулом при разном порядке очереди
+    """
+    rng = random.Random(42)
+    files = [(f"file_{i}.bin", round(rng.uniform(0.01, 0.3), 3)) for i in range(n_files)]
+    print(f"\n=== БЕНЧМАРК ПУЛА ЗАГРУЗОК ({n_files} файлов, {max_workers} потоков) ===")
+
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=download_file, args=(filename, size), kwargs={"verbose": False})
+               for filename, size in files]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    thread_per_file_time = time.perf_counter() - start_time
+    print(f"Поток на файл: {thread_per_file_time:.2f} сек, потоков: {len(threads)}")
+
+    print(f"{'Порядок':<10} {'Время':<8} {'МБ/с':<8} {'p50':<8} {'p90':<8} {'p99':<8}")
+    results = {}
+    for order in ("shortest", "largest", "fifo"):
+        stats = pooled_download(files, max_workers=max_workers, order=order,
+                                bandwidth_limit=bandwidth_limit, verbose=False)
+        results[order] = stats
+        print(f"{order:<10} {stats['total_time']:<8.2f} {stats['throughput_mb_s']:<8.1f} "
+              f"{stats['latency_p50']:<8.2f} {stats['latency_p90']:<8.2f} {stats['latency_p99']:<8.2f}")
+    return results
+
+
+def _run_stub_server(conn, body_size, latency):
+    """Процесс заглушки: aiohttp-сервер, отвечающий body_size байт после задержки latency"""
+    body = os.urandom(body_size)
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        return web.Response(body=body)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/{name}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=16384)
+        await site.start()
+        conn.send(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def start_stub_server(body_size=16 * 1024, latency=0.05):
+    """
+    Запускает заглушку HTTP-сервера в отдельном процессе
+
+    Возвращает:
+    tuple: (процесс, базовый URL); остановка - process.terminate()
+    """
+    if aiohttp is None:
+        raise RuntimeError("Для заглушки сервера требуется aiohttp")
+    parent_conn, child_conn = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_run_stub_server,
+                                      args=(child_conn, body_size, latency), daemon=True)
+    process.start()
+    port = parent_conn.recv()
+    return process, f"http://127.0.0.1:{port}"
+
+
+def _measure_download_backend(result_queue, files, backend, dest_dir):
+    """Выполняется в отдельном процессе, чтобы пиковая память не смешивалась между запусками"""
+    try:
+        stats = pooled_download(files, max_workers=len(files), order="fifo", backend=backend,
+                                verbose=False, dest_dir=dest_dir)
+        stats["peak_rss_mb"] = peak_rss_mb()
+    except Exception as e:  # например, RuntimeError: can't start new thread при 10000 потоках
+        stats = {"error": f"{type(e).__name__}: {e}"}
+    result_queue.put(stats)
+
+
+def _wait_backend_result(result_queue, process, timeout):
+    """Ждет результат замера; если процесс умер или завис, возвращает запись с ошибкой"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                return {"error": f"процесс завершился с кодом {process.exitcode}"}
+            if time.perf_counter() > deadline:
+                process.terminate()
+                return {"error": f"нет результата за {timeout} сек"}
+
+
+def benchmark_download_backends(counts=(10, 1000, 10000), body_size=16 * 1024, latency=0.05, timeout=600):
+    """
+    Сравнивает потоки и asyncio при 10, 1000 и 10000 одновременных загрузках
+
+    Каждый запуск выполняется в отдельном процессе против заглушки сервера;
+    для потоков создается по потоку на файл, для asyncio - по корутине на файл
+    с общим пулом соединений. Если процесс замера упал или не уложился в
+    timeout секунд, бэкенд отмечается как неудавшийся.
+    """
+    print(f"\n=== БЕНЧМАРК БЭКЕНДОВ ЗАГРУЗКИ (ответ {body_size // 1024} КБ, задержка {latency} сек) ===")
+    print(f"{'Файлов':<8} {'Бэкенд':<9} {'Время':<8} {'Ошибок':<8} {'Пик RSS, МБ':<12}")
+
+    server, base_url = start_stub_server(body_size, latency)
+    results = []
+    try:
+        for count in counts:
+            files = [(f"file_{i}.bin", body_size / (1024 * 1024), f"{base_url}/file_{i}.bin")
+                     for i in range(count)]
+            for backend in ("thread", "asyncio"):
+                with tempfile.TemporaryDirectory() as dest_dir:
+                    result_queue = multiprocessing.Queue()
+                    process = multiprocessing.Process(target=_measure_download_backend,
+                                                      args=(result_queue, files, backend, dest_dir))
+                    process.start()
+                    stats = _wait_backend_result(result_queue, process, timeout)
+                    process.join()
+
+                if "error" in stats:
+                    print(f"{count:<8} {backend:<9} не удалось: {stats['error']}")
+                    results.append((count, backend, stats))
+                    continue
+                rss = stats["peak_rss_mb"]
+                print(f"{count:<8} {backend:<9} {stats['total_time']:<8.2f} {stats['errors']:<8} "
+                      f"{rss if rss is None else round(rss, 1)!s:<12}")
+                results.append((count, backend, stats))
+    finally:
+        server.terminate()
+        server.join()
+    return results
 
 
 def task2_threaded_downloader():
@@ -65,5 +920,12 @@ def task2_threaded_downloader():
     print(f"Общее время загрузки: {end_time - start_time:.2f} секунд")
     print(f"Загружено файлов: {len(files)}")
 
+
 # Запуск задачи
-task2_threaded_downloader()
+if __name__ == "__main__":
+    task2_threaded_downloader()
+    benchmark_stream_download()
+    benchmark_segmented_download()
+    benchmark_pooled_download()
+    benchmark_download_backends()
+
@@ -1,7 +1,30 @@
+import atexit
+import contextlib
+import io
+import json
 import multiprocessing
 import time
+import hashlib
 import math
+import os
+import pickle
+import random
+import statistics
 import sys
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy пакетная проверка использует gcd с примориалом
+    np = None
+
+
+# Основания, при которых тест Миллера-Рабина детерминирован для n < 3.3 * 10^24
+# (в том числе для всех 64-битных чисел)
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MILLER_RABIN_DETERMINISTIC_LIMIT = 3317044064679887385961981
+# Граница малых простых для предварительного отсева в пакетном режиме
+SMALL_PRIME_LIMIT = 1000
 
 
 def calculate_factorial(n):
@@ -15,22 +38,781 @@ def calculate_factorial(n):
     return result
 
 
+def calculate_factorial_summary(n, modulus=None):
+    """
+    Вычисляет факториал, но возвращает только краткую сводку о нем
+
+    Сводка (число цифр, SHA-256 байтов, остаток по модулю) занимает десятки
+    байт, поэтому передача результата из процесса почти ничего не стоит.
+    """
+    print(f"Начало вычисления факториала {n}!")
+    summary = summarize_int(math.factorial(n), modulus)
+    print(f"Завершено вычисление факториала {n}!")
+    return summary
+
+
+def calculate_factorial_shared(n):
+    """
+    Вычисляет факториал и кладет его байты в multiprocessing.shared_memory
+
+    Возвращает:
+    tuple: (имя блока разделяемой памяти, число байт) - читается read_shared_int
+    """
+    print(f"Начало вычисления факториала {n}!")
+    data = int_to_bytes(math.factorial(n))
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    block.buf[:len(data)] = data
+    name = block.name
+    block.close()
+    # Блок освобождает родитель (read_shared_int), поэтому снимаем его с учета
+    # в этом процессе, иначе трекер ресурсов удалит блок при выходе процесса.
+    # Трекер используется только на POSIX и хранит имя с ведущим "/"
+    if os.name == "posix":
+        resource_tracker.unregister("/" + name, "shared_memory")
+    print(f"Завершено вычисление факториала {n}!")
+    return name, len(data)
+
+
+def read_shared_int(handle):
+    """
+    Восстанавливает число из блока разделяемой памяти и освобождает блок
+    """
+    name, size = handle
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        value = int.from_bytes(block.buf[:size], "little")
+    finally:
+        block.close()
+        block.unlink()
+    return value
+
+
+def int_to_bytes(x):
+    """Байтовое представление неотрицательного целого (little-endian)"""
+    return x.to_bytes(max(1, (x.bit_length() + 7) // 8), "little")
+
+
+def summarize_int(x, modulus=None):
+    """
+    Краткая сводка о большом числе: число цифр, SHA-256 и остаток по модулю
+    """
+    return {
+        "digits": digit_count(x),
+        "sha256": hashlib.sha256(int_to_bytes(x)).hexdigest(),
+        "mod": x % modulus if modulus else None,
+    }
+
+
+def range_product(numbers):
+    """
+    Перемножает числа последовательности сбалансированным деревом
+
+    Множители соседних уровней дерева имеют близкую длину, поэтому
+    умножение больших чисел (Карацуба) работает эффективнее, чем при
+    последовательном накоплении произведения.
+
+    Параметры:
+    numbers (range или list): последовательность с доступом по индексу
+    """
+    if len(numbers) == 0:
+        return 1
+    if len(numbers) <= 16:
+        result = 1
+        for x in numbers:
+            result *= x
+        return result
+    middle = len(numbers) // 2
+    return range_product(numbers[:middle]) * range_product(numbers[middle:])
+
+
+def tree_product(values):
+    """Перемножает список чисел попарно, уровень за уровнем"""
+    values = list(values) or [1]
+    while len(values) > 1:
+        paired = [a * b for a, b in zip(values[::2], values[1::2])]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+
+def parallel_factorial(n, processes=None, chunks=None, pool=None):
+    """
+    Вычисляет n! на пуле процессов
+
+    Числа 1..n делятся на chunks чередующихся подпоследовательностей
+    (i, i + chunks, i + 2*chunks, ...), чтобы части были равной стоимости.
+    Частичные произведения считаются в процессах и объединяются
+    сбалансированным деревом.
+
+    Параметры:
+    n (int): число
+    processes (int): размер пула (по умолчанию - число ядер)
+    chunks (int): число частей (по умолчанию 4 * processes)
+    pool (multiprocessing.Pool): готовый пул; если не задан, создается временный
+    """
+    if n < 0:
+        raise ValueError("Факториал определен только для неотрицательных чисел")
+    processes = processes or os.cpu_count() or 1
+    chunks = max(1, min(chunks or 4 * processes, n))
+    parts = [range(i, n + 1, chunks) for i in range(1, chunks + 1)]
+
+    if pool is None:
+        with multiprocessing.Pool(processes=processes) as own_pool:
+            partials = own_pool.map(range_product, parts)
+    else:
+        partials = pool.map(range_product, parts)
+
+    return tree_product(partials)
+
+
+def digit_count(x):
+    """
+    Число десятичных цифр целого числа без преобразования в строку
+
+    Оценка по bit_length ошибается не более чем на единицу и уточняется
+    одним сравнением со степенью 10.
+    """
+    x = abs(x)
+    if x == 0:
+        return 1
+    estimate = int((x.bit_length() - 1) * math.log10(2)) + 1
+    return estimate + 1 if x >= 10 ** estimate else estimate
+
+
+def factorial_digit_count(n):
+    """
+    Число цифр n! без вычисления самого факториала (через lgamma)
+
+    Если дробная часть log10(n!) слишком близка к целому и точности
+    float может не хватить, вычисляется точное значение.
+    """
+    if n < 2:
+        return 1
+    log10_value = math.lgamma(n + 1) / math.log(10)
+    fraction = log10_value - math.floor(log10_value)
+    if min(fraction, 1 - fraction) < 1e-9 * max(1.0, log10_value):
+        return digit_count(math.factorial(n))
+    return math.floor(log10_value) + 1
+
+
+def factorial_mod(n, m):
+    """
+    Вычисляет n! mod m, не строя большое число
+
+    При n >= m произведение содержит множитель m, поэтому результат 0.
+    """
+    if m <= 0:
+        raise ValueError("Модуль должен быть положительным")
+    if n >= m:
+        return 0
+    result = 1 % m
+    for i in range(2, n + 1):
+        result = result * i % m
+    return result
+
+
 def calculate_prime(n):
     """
-    Проверяет, является ли число простым
+    Проверяет, является ли число простым (тест Миллера-Рабина)
     """
     print(f"Начало проверки числа {n} на простоту")
 
-    if n < 2:
-        result = False
-    else:
-        result = all(n % i != 0 for i in range(2, int(math.sqrt(n)) + 1))
+    result = is_prime(n)
 
     print(f"Число {n} простое: {result}")
     return result
 
 
-def task3_multiprocess_calculations():
+def trial_division_is_prime(n):
+    """
+    Проверка простоты перебором делителей до sqrt(n) - O(sqrt(n)), для сравнения
+    """
+    if n < 2:
+        return False
+    return all(n % i != 0 for i in range(2, math.isqrt(n) + 1))
+
+
+def is_prime(n, rounds=20):
+    """
+    Тест Миллера-Рабина
+
+    Для n < 3.3 * 10^24 (все 64-битные числа) проверка по фиксированным
+    основаниям детерминирована. Для больших чисел используется rounds
+    случайных оснований, вероятность ошибки не превышает 4^-rounds.
+
+    Параметры:
+    n (int): проверяемое число
+    rounds (int): число раундов для больших чисел
+    """
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    if n < MILLER_RABIN_DETERMINISTIC_LIMIT:
+        bases = MILLER_RABIN_BASES
+    else:
+        bases = [random.randrange(2, n - 1) for _ in range(rounds)]
+
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def small_primes(limit):
+    """Простые числа до limit включительно (решето Эратосфена)"""
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[:2] = b"\x00\x00"
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return [i for i in range(limit + 1) if sieve[i]]
+
+
+def batch_is_prime(candidates, segment_size=1 << 16, rounds=20):
+    """
+    Проверяет простоту множества чисел
+
+    Кандидаты обрабатываются сегментами: сначала отсеиваются делящиеся
+    на малые простые (векторно через NumPy, если он есть и числа
+    помещаются в 64 бита, иначе одним gcd с их произведением), и только
+    оставшиеся проверяются тестом Миллера-Рабина.
+
+    Параметры:
+    candidates (sequence[int]): проверяемые числа
+    segment_size (int): размер сегмента для отсева
+    rounds (int): число раундов Миллера-Рабина для больших чисел
+
+    Возвращает:
+    list[bool]: результаты в порядке входа
+    """
+    primes = small_primes(SMALL_PRIME_LIMIT)
+    prime_set = set(primes)
+    primorial = math.prod(primes)
+    candidates = list(candidates)
+    use_numpy = np is not None and all(0 <= c < 2 ** 64 for c in candidates)
+
+    results = []
+    for offset in range(0, len(candidates), segment_size):
+        segment = candidates[offset:offset + segment_size]
+
+        if use_numpy:
+            values = np.array(segment, dtype=np.uint64)
+            composite = values < 2
+            for p in primes:
+                composite |= (values % np.uint64(p) == 0) & (values != np.uint64(p))
+            survivors = (~composite).tolist()
+        else:
+            survivors = [c >= 2 and (c in prime_set or math.gcd(c, primorial) == 1) for c in segment]
+
+        for c, survived in zip(segment, survivors):
+            if not survived:
+                results.append(False)
+            elif c <= SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT:
+                # Не делится на простые до SMALL_PRIME_LIMIT - значит простое
+                results.append(True)
+            else:
+                results.append(is_prime(c, rounds))
+    return results
+
+
+def benchmark_primality(batch_size=200000):
+    """
+    Сравнивает перебор делителей с тестом Миллера-Рабина и пакетный режим
+    с поштучной проверкой
+    """
+    print("\n=== БЕНЧМАРК ПРОВЕРКИ ПРОСТОТЫ ===")
+    print(f"{'Число':<22} {'перебор, сек':<14} {'Миллер-Рабин, мкс':<18} {'простое':<8}")
+    for n in (10000019, 10000033, 10000000019, 10000000033):
+        start_time = time.perf_counter()
+        expected = trial_division_is_prime(n)
+        trial_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        actual = is_prime(n)
+        mr_time = time.perf_counter() - start_time
+
+        if actual != expected:
+            raise AssertionError(f"Неверный результат для {n}")
+        print(f"{n:<22} {trial_time:<14.3f} {mr_time * 1e6:<18.1f} {actual!s:<8}")
+
+    # Большие числа: перебор уже невозможен
+    for n in (2 ** 61 - 1, 2 ** 127 - 1, 2 ** 521 - 1):
+        start_time = time.perf_counter()
+        actual = is_prime(n)
+        mr_time = time.perf_counter() - start_time
+        print(f"{'2^' + str(n.bit_length()) + ' - 1':<22} {'-':<14} {mr_time * 1e6:<18.1f} {actual!s:<8}")
+
+    rng = random.Random(42)
+    candidates = [rng.randrange(10 ** 9, 2 ** 63) for _ in range(batch_size)]
+
+    start_time = time.perf_counter()
+    expected = [is_prime(c) for c in candidates]
+    single_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    actual = batch_is_prime(candidates)
+    batch_time = time.perf_counter() - start_time
+
+    if actual != expected:
+        raise AssertionError("Пакетный режим дал другой результат")
+    backend = "NumPy" if np is not None else "gcd"
+    print(f"\nПакет из {batch_size} 63-битных чисел ({sum(actual)} простых):")
+    print(f"Поштучно: {single_time:.2f} сек, пакетно ({backend}): {batch_time:.2f} сек, "
+          f"ускорение {single_time / batch_time:.2f}x")
+
+
+def benchmark_factorial(ns=(10 ** 5, 3 * 10 ** 5, 10 ** 6), processes=None):
+    """
+    Сравнивает math.factorial, параллельное дерево произведений и быстрый
+    подсчет числа цифр на растущих n
+    """
+    processes = processes or os.cpu_count() or 1
+    print(f"\n=== БЕНЧМАРК ФАКТОРИАЛА ({processes} процессов) ===")
+    print(f"{'n':<10} {'math.factorial':<16} {'параллельно':<14} {'ускорение':<11} {'цифр (lgamma)':<14}")
+
+    results = []
+    with multiprocessing.Pool(processes=processes) as pool:
+        pool.map(range_product, [range(1, 2)] * processes)  # прогрев процессов
+        for n in ns:
+            start_time = time.perf_counter()
+            expected = math.factorial(n)
+            math_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            actual = parallel_factorial(n, processes=processes, pool=pool)
+            parallel_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            digits = factorial_digit_count(n)
+            digits_time = time.perf_counter() - start_time
+
+            if actual != expected or digits != digit_count(expected):
+                raise AssertionError(f"Неверный результат для n={n}")
+
+            print(f"{n:<10} {math_time:<16.3f} {parallel_time:<14.3f} "
+                  f"{math_time / parallel_time:<11.2f} {digits_time * 1e6:.1f} мкс")
+            results.append((n, math_time, parallel_time, digits_time))
+    return results
+
+
+def _timed_call(func, arg):
+    """Вызывает func(arg) в процессе и возвращает результат вместе со временем вычисления"""
+    start_time = time.perf_counter()
+    result = func(arg)
+    return result, time.perf_counter() - start_time
+
+
+def benchmark_result_transfer(ns=(10 ** 5, 3 * 10 ** 5, 10 ** 6)):
+    """
+    Сравнивает стоимость возврата факториала из процесса целиком, сводкой
+    и через разделяемую память: объем pickle и время сверх вычисления
+    """
+    print("\n=== БЕНЧМАРК ПЕРЕДАЧИ РЕЗУЛЬТАТОВ ИЗ ПРОЦЕССОВ ===")
+    print(f"{'n':<10} {'режим':<15} {'байт через pickle':<19} {'передача, сек':<14}")
+
+    modes = [
+        ("значение", calculate_factorial),
+        ("сводка", calculate_factorial_summary),
+        ("shared_memory", calculate_factorial_shared),
+    ]
+    results = []
+    with multiprocessing.Pool(processes=1) as pool:
+        for n in ns:
+            for mode, func in modes:
+                start_time = time.perf_counter()
+                result, compute_time = pool.apply(_timed_call, (func, n))
+                # Через канал пула проходит только result: для shared_memory это
+                # дескриптор (имя блока, размер), само число лежит в общей памяти
+                ipc_bytes = len(pickle.dumps(result))
+                if func is calculate_factorial_shared:
+                    result = read_shared_int(result)
+                transfer_time = time.perf_counter() - start_time - compute_time
+
+                print(f"{n:<10} {mode:<15} {ipc_bytes:<19,} {transfer_time:<14.4f}")
+                results.append((n, mode, ipc_bytes, transfer_time))
+    return results
+
+
+# Постоянный пул процессов, создается при первом обращении
+_worker_pool = None
+_worker_pool_size = None
+
+
+def available_cpus():
+    """Число ядер, доступных процессу (с учетом привязки к CPU)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_worker_pool(processes=None):
+    """
+    Возвращает общий пул процессов, запуская его при первом вызове
+
+    Пул переиспользуется между вызовами, поэтому стоимость запуска
+    процессов платится один раз. Запрос пула другого размера
+    перезапускает его.
+    """
+    global _worker_pool, _worker_pool_size
+    processes = processes or available_cpus()
+    if _worker_pool is not None and _worker_pool_size != processes:
+        shutdown_worker_pool()
+    if _worker_pool is None:
+        _worker_pool = multiprocessing.Pool(processes=processes)
+        _worker_pool_size = processes
+    return _worker_pool
+
+
+def shutdown_worker_pool():
+    """Останавливает общий пул процессов (вызывается и при выходе)"""
+    global _worker_pool, _worker_pool_size
+    if _worker_pool is not None:
+        _worker_pool.close()
+        _worker_pool.join()
+        _worker_pool = None
+        _worker_pool_size = None
+
+
+atexit.register(shutdown_worker_pool)
+
+
+# Разрядность «цифры» длинного целого CPython и показатель Карацубы
+LONG_DIGIT_BITS = 30
+KARATSUBA_EXPONENT = math.log2(3)
+
+
+def multiplication_cost(bits):
+    """Стоимость умножения двух чисел по bits бит в умножениях цифр CPython"""
+    return max(1.0, bits / LONG_DIGIT_BITS) ** KARATSUBA_EXPONENT
+
+
+def estimate_cost(func, arg):
+    """
+    Оценка стоимости задачи в умножениях цифр CPython (одни единицы для всех задач)
+
+    Факториал: дерево произведений - на уровне j от корня 2^(j-1) умножений
+    сомножителей по log2(n!) / 2^j бит.
+    Проверка простоты (Миллер-Рабин): на каждое основание - bits модульных
+    возведений в квадрат, каждое около 2 * (цифр)^2 (умножение и деление).
+    """
+    if func in (calculate_factorial, calculate_factorial_summary, calculate_factorial_shared):
+        if arg < 2:
+            return 1
+        total_bits = math.lgamma(arg + 1) / math.log(2)
+        depth = max(1, math.ceil(math.log2(arg)))
+        return sum(2 ** (j - 1) * multiplication_cost(total_bits / 2 ** j) for j in range(1, depth + 1))
+    if func in (calculate_prime, is_prime):
+        bits = max(arg, 2).bit_length()
+        digits = math.ceil(bits / LONG_DIGIT_BITS)
+        return len(MILLER_RABIN_BASES) * bits * 2 * digits ** 2
+    return 1
+
+
+def check_cost_model(tasks, repeats=3):
+    """
+    Сверяет порядок задач по estimate_cost с порядком по измеренному времени
+
+    Сравниваются только пары, оценки которых различаются хотя бы вдвое
+    (почти равные задачи могут меняться местами из-за шума замеров).
+
+    Возвращает:
+    list: пары задач, порядок которых оценка предсказала неверно
+    """
+    measured = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for func, arg in set(tasks):
+            times = []
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                func(arg)
+                times.append(time.perf_counter() - start_time)
+            measured[(func, arg)] = min(times)
+    jobs = sorted(measured, key=lambda job: estimate_cost(*job))
+    mismatches = []
+    for i, cheap in enumerate(jobs):
+        for costly in jobs[i + 1:]:
+            if estimate_cost(*costly) >= 2 * estimate_cost(*cheap) and measured[costly] < measured[cheap]:
+                mismatches.append((cheap, costly))
+    print(f"{'Задача':<32} {'Оценка':>14} {'Время, мс':>10}")
+    for func, arg in jobs:
+        print(f"{func.__name__ + '(' + str(arg) + ')':<32} {estimate_cost(func, arg):>14,.0f} "
+              f"{measured[(func, arg)] * 1000:>10.3f}")
+    print(f"Оценка стоимости согласуется с замерами: {'да' if not mismatches else 'нет'}")
+    for cheap, costly in mismatches:
+        print(f"  {costly[0].__name__}({costly[1]}) оценена дороже {cheap[0].__name__}({cheap[1]}), но быстрее")
+    return mismatches
+
+
+def run_weighted(tasks, pool=None):
+    """
+    Выполняет задачи на пуле, раздавая их от самой дорогой к самой дешевой
+
+    Задачи ставятся в общую очередь пула по убыванию estimate_cost, и
+    каждый освободившийся процесс забирает следующую: крупные задачи
+    стартуют первыми, а мелкие добирают простаивающие процессы.
+
+    Параметры:
+    tasks (list): список пар (func, arg)
+    pool (multiprocessing.Pool): пул (по умолчанию - get_worker_pool())
+
+    Возвращает:
+    list: результаты в порядке входа
+    """
+    pool = pool or get_worker_pool()
+    order = sorted(range(len(tasks)), key=lambda i: estimate_cost(*tasks[i]), reverse=True)
+    async_results = {i: pool.apply_async(tasks[i][0], (tasks[i][1],)) for i in order}
+    return [async_results[i].get() for i in range(len(tasks))]
+
+
+def benchmark_warm_pool(repeats=5):
+    """
+    Сравнивает новый пул на каждый запуск с постоянным пулом и порядок
+    раздачи задач: исходный против самых дорогих первыми
+    """
+    # Самая дорогая задача стоит в конце, как бывает при произвольном порядке
+    tasks = [
+        (calculate_prime, 10000000019),
+        (calculate_factorial, 20000),
+        (calculate_prime, 10000000033),
+        (calculate_factorial, 40000),
+        (calculate_factorial, 10000),
+        (calculate_factorial, 150000),
+    ]
+    processes = available_cpus()
+    print(f"\n=== БЕНЧМАРК ПОСТОЯННОГО ПУЛА ({processes} процессов, {repeats} повторов) ===")
+    check_cost_model(tasks)
+
+    def measure(run):
+        times = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start_time)
+        return sum(times) / len(times)
+
+    # Вывод задач подавляется в рабочих процессах обоих вариантов одинаково:
+    # redirect_stdout действует только на родителя
+    def cold_run():
+        with multiprocessing.Pool(processes=processes, initializer=_silence_output) as pool:
+            async_results = [pool.apply_async(func, (arg,)) for func, arg in tasks]
+            [async_result.get() for async_result in async_results]
+
+    def warm_fifo_run():
+        async_results = [warm_pool.apply_async(func, (arg,)) for func, arg in tasks]
+        [async_result.get() for async_result in async_results]
+
+    def warm_weighted_run():
+        run_weighted(tasks, warm_pool)
+
+    start_time = time.perf_counter()
+    warm_pool = multiprocessing.Pool(processes=processes, initializer=_silence_output)
+    warm_pool.apply(int)  # дожидаемся готовности процессов
+    startup_time = time.perf_counter() - start_time
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cold_time = measure(cold_run)
+            fifo_time = measure(warm_fifo_run)
+            weighted_time = measure(warm_weighted_run)
+    finally:
+        warm_pool.close()
+        warm_pool.join()
+
+    print(f"Запуск пула: {startup_time:.3f} сек (платится один раз)")
+    print(f"Новый пул на каждый запуск: {cold_time:.3f} сек")
+    print(f"Постоянный пул, исходный порядок: {fifo_time:.3f} сек")
+    print(f"Постоянный пул, дорогие первыми: {weighted_time:.3f} сек")
+    print(f"Экономия от переиспользования пула: {cold_time - fifo_time:.3f} сек на запуск")
+    print(f"Ускорение относительно нового пула: {cold_time / weighted_time:.2f}x")
+    return cold_time, fifo_time, weighted_time
+
+
+def _silence_output():
+    """Инициализатор процессов пула: подавляет вывод задач во время замеров"""
+    sys.stdout = open(os.devnull, "w")
+
+
+def measure_ns(func, warmups=1, repeats=5):
+    """
+    Выполняет func() warmups раз без замера, затем repeats раз с замером
+
+    Возвращает:
+    list[int]: длительности повторов в наносекундах (perf_counter_ns)
+    """
+    for _ in range(warmups):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def summarize_timings(samples_ns):
+    """Медиана, среднее, p95, стандартное отклонение, минимум и максимум в секундах"""
+    seconds = [x / 1e9 for x in samples_ns]
+    ordered = sorted(seconds)
+    p95_index = max(0, math.ceil(0.95 * len(ordered)) - 1)
+    return {
+        "median": statistics.median(seconds),
+        "mean": statistics.fmean(seconds),
+        "p95": ordered[p95_index],
+        "stddev": statistics.stdev(seconds) if len(seconds) > 1 else 0.0,
+        "min": ordered[0],
+        "max": ordered[-1],
+        "samples": seconds,
+    }
+
+
+def speedup_confidence_interval(baseline_ns, candidate_ns, confidence=0.95, resamples=2000, seed=42):
+    """
+    Ускорение (отношение медиан) с доверительным интервалом бутстрепом
+
+    Возвращает:
+    tuple: (ускорение, нижняя граница, верхняя граница)
+    """
+    rng = random.Random(seed)
+    point = statistics.median(baseline_ns) / statistics.median(candidate_ns)
+    estimates = []
+    for _ in range(resamples):
+        base = [rng.choice(baseline_ns) for _ in baseline_ns]
+        cand = [rng.choice(candidate_ns) for _ in candidate_ns]
+        estimates.append(statistics.median(base) / statistics.median(cand))
+    estimates.sort()
+    tail = (1 - confidence) / 2
+    low = estimates[int(tail * (resamples - 1))]
+    high = estimates[int((1 - tail) * (resamples - 1))]
+    return point, low, high
+
+
+def fit_amdahl(worker_counts, speedups):
+    """
+    Подбирает последовательную долю f закона Амдала S(p) = 1 / (f + (1 - f) / p)
+
+    1 / S - 1 / p = f * (1 - 1 / p) линейно по f, поэтому f находится
+    методом наименьших квадратов без итераций.
+    """
+    numerator = 0.0
+    denominator = 0.0
+    for p, speedup in zip(worker_counts, speedups):
+        x = 1 - 1 / p
+        numerator += x * (1 / speedup - 1 / p)
+        denominator += x * x
+    if denominator == 0:
+        return None
+    return min(1.0, max(0.0, numerator / denominator))
+
+
+def benchmark_task3_scaling(worker_counts=None, warmups=1, repeats=5, json_path=None):
+    """
+    Честное сравнение последовательного и многопроцессного выполнения задач task3
+
+    - прогревочные прогоны перед замерами и для последовательного, и для
+      параллельного варианта;
+    - запуск пула замеряется отдельно и не входит во время задач;
+    - для каждого числа процессов - медиана, p95, стандартное отклонение и
+      ускорение с 95% доверительным интервалом;
+    - по кривой масштабирования подбирается закон Амдала.
+
+    Параметры:
+    worker_counts (list[int]): числа процессов (по умолчанию 1, 2, 4, ... до числа ядер)
+    warmups, repeats (int): число прогревов и замеров
+    json_path (str): куда записать результаты в JSON (None - не записывать)
+
+    Возвращает:
+    dict: результаты в том же виде, что и JSON
+    """
+    tasks = [
+        (calculate_factorial, 50000),
+        (calculate_factorial, 40000),
+        (calculate_prime, 10000000019),
+        (calculate_prime, 10000000033),
+    ]
+    if worker_counts is None:
+        cpus = available_cpus()
+        worker_counts = sorted({2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus} | {cpus})
+
+    print(f"\n=== БЕНЧМАРК МАСШТАБИРОВАНИЯ TASK3 ({warmups} прогрев, {repeats} замеров) ===")
+
+    def run_sequential():
+        for func, arg in tasks:
+            func(arg)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sequential_ns = measure_ns(run_sequential, warmups, repeats)
+    sequential = summarize_timings(sequential_ns)
+
+    report = {
+        "tasks": [[func.__name__, arg] for func, arg in tasks],
+        "warmups": warmups,
+        "repeats": repeats,
+        "sequential": sequential,
+        "parallel": [],
+    }
+    print(f"{'процессов':<10} {'запуск пула':<12} {'медиана':<9} {'p95':<9} {'σ':<9} {'ускорение (95% ДИ)'}")
+    print(f"{'посл.':<10} {'-':<12} {sequential['median']:<9.3f} {sequential['p95']:<9.3f} "
+          f"{sequential['stddev']:<9.3f} 1.00")
+
+    for workers in worker_counts:
+        start = time.perf_counter_ns()
+        pool = multiprocessing.Pool(processes=workers, initializer=_silence_output)
+        # Пул считается готовым, когда все процессы ответили
+        pool.map(abs, range(workers), chunksize=1)
+        startup_seconds = (time.perf_counter_ns() - start) / 1e9
+
+        try:
+            parallel_ns = measure_ns(lambda: run_weighted(tasks, pool), warmups, repeats)
+        finally:
+            pool.close()
+            pool.join()
+
+        timings = summarize_timings(parallel_ns)
+        speedup, low, high = speedup_confidence_interval(sequential_ns, parallel_ns)
+        report["parallel"].append({
+            "workers": workers,
+            "pool_startup": startup_seconds,
+            "timings": timings,
+            "speedup": speedup,
+            "speedup_ci95": [low, high],
+        })
+        print(f"{workers:<10} {startup_seconds:<12.3f} {timings['median']:<9.3f} {timings['p95']:<9.3f} "
+              f"{timings['stddev']:<9.3f} {speedup:.2f} [{low:.2f}; {high:.2f}]")
+
+    serial_fraction = fit_amdahl([r["workers"] for r in report["parallel"]],
+                                 [r["speedup"] for r in report["parallel"]])
+    report["amdahl_serial_fraction"] = serial_fraction
+    if serial_fraction is not None:
+        limit = 1 / serial_fraction if serial_fraction > 0 else float("inf")
+        print(f"Закон Амдала: последовательная доля {serial_fraction:.3f}, "
+              f"предельное ускорение {limit:.1f}x")
+        report["amdahl_speedup_limit"] = limit if serial_fraction > 0 else None
+
+    if json_path is not None:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты записаны в {json_path}")
+    return report
+
+
+def task3_multiprocess_calculations(result_mode="value", warm_pool=False):
     """
     Задача: Реализуйте многопроцессные вычисления.
     Вычисления:
@@ -43,7 +825,21 @@ def task3_multiprocess_calculations():
     - Выполнить вычисления в отдельных процессах
     - Сравнить время с последовательным выполнением
     - Собрать и вывести результаты
+
+    Параметры:
+    result_mode (str): как возвращать факториалы из процессов:
+        'value' - число целиком, 'summary' - только сводка (summarize_int),
+        'shared_memory' - байты через multiprocessing.shared_memory
+    warm_pool (bool): использовать постоянный пул (get_worker_pool) с
+        раздачей задач по оценке стоимости вместо нового Pool(4)
     """
+    if result_mode not in ("value", "summary", "shared_memory"):
+        raise ValueError(f"Неизвестный режим результата: {result_mode}")
+    factorial_funcs = {
+        "value": calculate_factorial,
+        "summary": calculate_factorial_summary,
+        "shared_memory": calculate_factorial_shared,
+    }
     # Увеличиваем лимит для преобразования больших целых чисел в строки
     sys.set_int_max_str_digits(1000000)  # Устанавливаем достаточно высокий лимит
 
@@ -65,22 +861,35 @@ def task3_multiprocess_calculations():
     # TODO: Создайте и запустите процессы
     # TODO: Соберите результаты
 
-    # Создаем пул процессов
-    pool = multiprocessing.Pool(processes=4)
-
-    # Запускаем вычисления в отдельных процессах
-    async_results = []
+    tasks = []
     for func, arg in calculations:
-        async_result = pool.apply_async(func, (arg,))
-        async_results.append(async_result)
+        if func == calculate_factorial:
+            func = factorial_funcs[result_mode]
+        tasks.append((func, arg))
+
+    if warm_pool:
+        # Постоянный пул: задачи раздаются от самой дорогой к самой дешевой
+        raw_results = run_weighted(tasks)
+    else:
+        # Создаем пул процессов
+        pool = multiprocessing.Pool(processes=4)
+
+        # Запускаем вычисления в отдельных процессах
+        async_results = []
+        for func, arg in tasks:
+            async_result = pool.apply_async(func, (arg,))
+            async_results.append(async_result)
 
-    # Закрываем пул и ждем завершения всех процессов
-    pool.close()
-    pool.join()
+        # Закрываем пул и ждем завершения всех процессов
+        pool.close()
+        pool.join()
+        raw_results = [async_result.get() for async_result in async_results]
 
     # Собираем результаты
-    for async_result in async_results:
-        results.append(async_result.get())
+    for (func, arg), result in zip(calculations, raw_results):
+        if func == calculate_factorial and result_mode == "shared_memory":
+            result = read_shared_int(result)
+        results.append(result)
 
     end_time = time.time()
     multiprocess_time = end_time - start_time
@@ -91,7 +900,10 @@ def task3_multiprocess_calculations():
 
     sync_results = []
     for func, arg in calculations:
-        sync_results.append(func(arg))
+        result = func(arg)
+        if func == calculate_factorial and result_mode == "summary":
+            result = summarize_int(result)
+        sync_results.append(result)
 
     end_time = time.time()
     sync_time = end_time - start_time
@@ -110,7 +922,8 @@ def task3_multiprocess_calculations():
         if func == calculate_factorial:
             # Для факториалов показываем только длину числа
             result = results[i]
-            print(f"Факториал {arg}! имеет {len(str(result))} цифр")
+            digits = result["digits"] if result_mode == "summary" else digit_count(result)
+            print(f"Факториал {arg}! имеет {digits} цифр")
         else:
             print(f"Число {arg} простое: {results[i]}")
 
@@ -128,4 +941,9 @@ def task3_multiprocess_calculations():
 
 # Запуск задачи
 if __name__ == "__main__":
-    task3_multiprocess_calculations()
\ No newline at end of file
+    task3_multiprocess_calculations()
+    benchmark_factorial()
+    benchmark_primality()
+    benchmark_result_transfer()
+    benchmark_warm_pool()
+    benchmark_task3_scaling()
@@ -1,25 +1,1001 @@
 import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import multiprocessing
+import math
+import os
+import random
+import sqlite3
+import tempfile
 import aiohttp
 import time
+import tracemalloc
+from collections import deque
+from aiohttp import web
 
 
-async def fetch_url(session, url, name):
+# Размер фрагмента при потоковом чтении тела ответа
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ByteCounter:
+    """Потребитель тела ответа: считает байты"""
+
+    def __init__(self):
+        self.count = 0
+
+    def feed(self, chunk):
+        self.count += len(chunk)
+
+    def result(self):
+        return self.count
+
+
+class HashConsumer:
+    """Потребитель тела ответа: считает хеш (по умолчанию SHA-256)"""
+
+    def __init__(self, algorithm="sha256"):
+        self.hash = hashlib.new(algorithm)
+
+    def feed(self, chunk):
+        self.hash.update(chunk)
+
+    def result(self):
+        return self.hash.hexdigest()
+
+
+class CharCounter:
+    """
+    Потребитель тела ответа: считает символы инкрементальным декодером
+
+    Многобайтовый символ, разрезанный границей фрагментов, декодер
+    дожидается целиком, поэтому результат совпадает с len(response.text()).
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.count = 0
+
+    def feed(self, chunk):
+        self.count += len(self.decoder.decode(chunk))
+
+    def result(self):
+        self.count += len(self.decoder.decode(b"", final=True))
+        return self.count
+
+
+class LineParser:
+    """
+    Инкрементальный разбор тела ответа по строкам
+
+    on_line(bytes) вызывается для каждой полной строки; в памяти хранится
+    только незавершенный хвост последнего фрагмента.
+    """
+
+    def __init__(self, on_line=None):
+        self.on_line = on_line
+        self.lines = 0
+        self.tail = b""
+
+    def feed(self, chunk):
+        *lines, self.tail = (self.tail + chunk).split(b"\n")
+        self.lines += len(lines)
+        if self.on_line is not None:
+            for line in lines:
+                self.on_line(line)
+
+    def result(self):
+        if self.tail:
+            self.lines += 1
+            if self.on_line is not None:
+                self.on_line(self.tail)
+            self.tail = b""
+        return self.lines
+
+
+class FileSink:
+    """Потребитель тела ответа: записывает его в файл"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+
+    def feed(self, chunk):
+        self.file.write(chunk)
+
+    def result(self):
+        self.file.close()
+        return self.path
+
+
+class CacheBlobWriter:
+    """
+    Потребитель тела ответа: пишет его во временный файл кэша, попутно
+    считая SHA-256, по которому блок затем кладется на постоянное место
+    """
+
+    def __init__(self, blob_dir):
+        fd, self.tmp_path = tempfile.mkstemp(dir=blob_dir, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def feed(self, chunk):
+        self.file.write(chunk)
+        self.hash.update(chunk)
+        self.size += len(chunk)
+
+    def result(self):
+        self.file.close()
+        return self.tmp_path, self.hash.hexdigest(), self.size
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class HttpCache:
+    """
+    Дисковый кэш HTTP-ответов для fetch_url
+
+    Индекс (URL, ETag, Last-Modified, размер, время доступа) хранится в
+    SQLite, тела - в файлах blobs/<sha256[:2]>/<sha256>, так что одинаковые
+    тела разных URL хранятся один раз. Каждое обращение перепроверяется
+    условным запросом: ответ 304 отдает результат из кэша без передачи
+    тела. При превышении max_bytes вытесняются давно не использованные записи.
+
+    Индекс работает в режиме WAL, а изменения фиксируются пакетами - раз в
+    commit_every изменений или commit_interval секунд, - а не на каждый
+    запрос: иначе синхронизация с диском на каждый ответ останавливала бы
+    цикл событий со всеми текущими загрузками. При сбое теряются лишь
+    последние изменения индекса; их тела просто загрузятся заново.
+
+    Параметры:
+    directory (str): каталог кэша
+    max_bytes (int): предельный суммарный размер тел
+    commit_every (int): число изменений индекса в одной фиксации
+    commit_interval (float): наибольший интервал между фиксациями в секундах
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, commit_every=256, commit_interval=1.0):
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, "blobs")
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                chars INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)")
+        self.db.commit()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "updated": 0,
+                      "stored": 0, "evictions": 0, "bytes_saved": 0}
+
+    def lookup(self, url):
+        """Запись кэша для URL (словарь) или None"""
+        row = self.db.execute(
+            "SELECT digest, size, chars, etag, last_modified FROM entries WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None or not os.path.exists(self.blob_path(row[0])):
+            return None
+        digest, size, chars, etag, last_modified = row
+        return {"url": url, "digest": digest, "size": size, "chars": chars,
+                "etag": etag, "last_modified": last_modified}
+
+    def conditional_headers(self, entry):
+        """Заголовки условного запроса для перепроверки записи"""
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_cacheable(self, response):
+        """Кэшируем только успешные ответы, которые можно перепроверить"""
+        if response.status != 200:
+            return False
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            return False
+        return "ETag" in response.headers or "Last-Modified" in response.headers
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def blob_writer(self):
+        return CacheBlobWriter(self.blob_dir)
+
+    def read_body(self, entry):
+        """Тело ответа из кэша"""
+        with open(self.blob_path(entry["digest"]), "rb") as f:
+            return f.read()
+
+    def record_revalidated(self, entry):
+        """Учитывает ответ 304: запись актуальна, тело не передавалось"""
+        self.db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry["url"]))
+        self._written()
+        self.stats["hits"] += 1
+        self.stats["revalidated"] += 1
+        self.stats["bytes_saved"] += entry["size"]
+
+    def record_miss(self, entry):
+        """Учитывает ответ с телом: промах или устаревшая запись"""
+        if entry is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["updated"] += 1
+
+    def store(self, url, response, writer, chars):
+        """Сохраняет тело, записанное writer, и валидаторы ответа"""
+        tmp_path, digest, size = writer.result()
+        path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+        old = self.lookup(url)
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, digest, size, chars, response.headers.get("ETag"),
+             response.headers.get("Last-Modified"), time.time()),
+        )
+        self._written()
+        if old is not None and old["digest"] != digest:
+            self._remove_blob_if_unused(old["digest"])
+        self.stats["stored"] += 1
+        self.evict()
+
+    def total_bytes(self):
+        """Суммарный размер хранимых тел (одинаковые тела считаются один раз)"""
+        row = self.db.execute("SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM entries)").fetchone()
+        return row[0] or 0
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока размер больше max_bytes"""
+        total = self.total_bytes()
+        while total > self.max_bytes:
+            row = self.db.execute("SELECT url, digest FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            url, digest = row
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._written()
+            self._remove_blob_if_unused(digest)
+            self.stats["evictions"] += 1
+            total = self.total_bytes()
+
+    def _written(self):
+        """Учитывает изменение индекса и фиксирует пакет, когда он набрался"""
+        self._pending_writes += 1
+        if (self._pending_writes >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.flush()
+
+    def flush(self):
+        """Фиксирует накопленные изменения индекса"""
+        self.db.commit()
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+    def _remove_blob_if_unused(self, digest):
+        in_use = self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if in_use is None and os.path.exists(self.blob_path(digest)):
+            os.remove(self.blob_path(digest))
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+async def fetch_url(session, url, name, stream=False, consumers=None, chunk_size=STREAM_CHUNK_SIZE,
+                    verbose=True, cache=None, **policy):
     """
     Асинхронно загружает веб-страницу
+
+    Параметры:
+    session (aiohttp.ClientSession): сессия
+    url (str): адрес
+    name (str): имя для вывода
+    stream (bool): читать тело фрагментами, не буферизуя его целиком
+    consumers (list): потребители фрагментов с методами feed(chunk) и result()
+    chunk_size (int): размер фрагмента в потоковом режиме
+    verbose (bool): печатать начало и завершение загрузки
+    cache (HttpCache): дисковый кэш с условной перепроверкой (None - без кэша)
+    policy: таймауты, повторы и хеджирование как у fetch_with_policy
+        (по умолчанию одна попытка без таймаутов)
+
+    Возвращает:
+    dict: результат fetch_with_policy; число символов в теле - в поле size
+    """
+    return await fetch_with_policy(session, url, name, **{**SINGLE_ATTEMPT, **policy}, stream=stream,
+                                   consumers=consumers, chunk_size=chunk_size, verbose=verbose,
+                                   cache=cache)
+
+
+async def _fetch(session, url, stream, consumers, chunk_size, cache):
     """
-    print(f"Начало загрузки {name}")
+    Одна попытка fetch_with_policy без обработки ошибок
+
+    Возвращает:
+    tuple: (статус ответа, число символов в теле)
+    """
+    entry = cache.lookup(url) if cache is not None else None
+    headers = cache.conditional_headers(entry) if entry is not None else None
+    writer = None
+    # Общий с RequestTimings словарь событий: сюда отмечается конец чтения тела,
+    # для которого у aiohttp нет события трассировки в потоковом режиме
+    events = {}
 
     try:
-        async with session.get(url) as response:
-            content = await response.text()
-            print(f"Завершена загрузка {name}, статус: {response.status}")
-            return len(content)
-    except Exception as e:
-        print(f"Ошибка при загрузке {name}: {e}")
-        return 0
+        async with session.get(url, headers=headers, trace_request_ctx=events) as response:
+            if entry is not None and response.status == 304:
+                cache.record_revalidated(entry)
+                return response.status, entry["chars"]
+
+            if cache is not None:
+                cache.record_miss(entry)
+                if cache.is_cacheable(response):
+                    writer = cache.blob_writer()
+
+            if not stream:
+                content = await response.text()
+                events["body_end"] = time.perf_counter()
+                if writer is not None:
+                    writer.feed(await response.read())  # тело уже прочитано text()
+                    cache.store(url, response, writer, len(content))
+                return response.status, len(content)
+
+            char_counter = CharCounter(response.charset or "utf-8")
+            all_consumers = [char_counter] + list(consumers or [])
+            if writer is not None:
+                all_consumers.append(writer)
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for consumer in all_consumers:
+                    consumer.feed(chunk)
+            for consumer in consumers or []:
+                consumer.result()
+
+            events["body_end"] = time.perf_counter()
+            chars = char_counter.result()
+            if writer is not None:
+                cache.store(url, response, writer, chars)
+            return response.status, chars
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+
+
+# Статусы, при которых запрос имеет смысл повторить
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 
+# Политика fetch_with_policy по умолчанию для fetch_url и crawl: одна попытка без таймаутов
+SINGLE_ATTEMPT = {"attempt_timeout": None, "budget": None, "retries": 0}
 
-async def task4_async_scraper():
+
+def percentile(values, q):
+    """Процентиль q (0-100) по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class LatencyTracker:
+    """
+    Скользящее окно последних задержек для выбора момента хеджирования
+
+    Параметры:
+    window (int): сколько последних замеров хранить
+    min_samples (int): сколько замеров нужно, чтобы доверять процентилю
+    """
+
+    def __init__(self, window=1000, min_samples=20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, latency):
+        self.samples.append(latency)
+
+    def quantile(self, q):
+        """Процентиль q или None, если замеров пока мало"""
+        if len(self.samples) < self.min_samples:
+            return None
+        return percentile(self.samples, q)
+
+
+async def fetch_with_policy(session, url, name, attempt_timeout=5.0, budget=15.0, retries=2,
+                            backoff=0.1, max_backoff=2.0, hedge_after=None, tracker=None,
+                            consumer_factory=None, verbose=False, **fetch_kwargs):
+    """
+    Загружает URL с таймаутом на попытку, общим бюджетом времени, повторами
+    с экспоненциальной задержкой и джиттером и необязательным хеджированием
+
+    Хеджирование: если попытка не завершилась за hedge_after секунд
+    (или за p95 из tracker при hedge_after="p95"), запускается дубликат
+    запроса; берется первый успешный ответ, второй запрос отменяется.
+
+    Повтор и дубликат заново читают тело, поэтому готовые consumers с ними
+    несовместимы: частично прочитанная попытка накормила бы их дважды.
+    В этом случае передается consumer_factory, и каждая попытка получает
+    свежий набор потребителей; в результат попадает набор удачной попытки.
+
+    Параметры:
+    attempt_timeout (float): таймаут одной попытки в секундах (None - без таймаута)
+    budget (float): общий бюджет времени на все попытки (None - без ограничения)
+    retries (int): число повторов после первой попытки
+    backoff, max_backoff (float): базовая и предельная задержка перед повтором
+    hedge_after (float или "p95"): задержка перед дубликатом (None - без хеджирования)
+    tracker (LatencyTracker): окно задержек; пополняется успешными ответами
+    consumer_factory (callable): возвращает новый список потребителей для каждой попытки
+    verbose (bool): печатать начало, завершение и ошибки загрузки
+    fetch_kwargs: stream, consumers, chunk_size, cache - как у fetch_url
+
+    Возвращает:
+    dict: name, url, ok, status, size, attempts, hedged, elapsed, error, consumers
+    """
+    consumers = fetch_kwargs.get("consumers")
+    if consumers and consumer_factory is not None:
+        raise ValueError("Нужно передать либо consumers, либо consumer_factory")
+    if consumers and (retries > 0 or hedge_after is not None):
+        raise ValueError("Повторы и хеджирование несовместимы с consumers - передайте consumer_factory")
+
+    stream = fetch_kwargs.get("stream", False)
+    chunk_size = fetch_kwargs.get("chunk_size", STREAM_CHUNK_SIZE)
+    cache = fetch_kwargs.get("cache")
+
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    deadline = start_time + budget if budget is not None else math.inf
+    outcome = {"name": name, "url": url, "ok": False, "status": None, "size": 0,
+               "attempts": 0, "hedged": False, "elapsed": 0.0, "error": None, "consumers": None}
+    if verbose:
+        print(f"Начало загрузки {name}")
+
+    async def single():
+        attempt_consumers = consumer_factory() if consumer_factory is not None else consumers
+        status, size = await _fetch(session, url, stream, attempt_consumers, chunk_size, cache)
+        return status, size, attempt_consumers
+
+    async def attempt(timeout):
+        if hedge_after is None:
+            return await asyncio.wait_for(single(), timeout)
+
+        if hedge_after == "p95":
+            delay = tracker.quantile(95) if tracker is not None else None
+        else:
+            delay = hedge_after
+        primary = asyncio.create_task(single())
+        tasks = {primary}
+        try:
+            async with asyncio.timeout(timeout):
+                if delay is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        outcome["hedged"] = True
+                        tasks.add(asyncio.create_task(single()))
+                while True:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        tasks.discard(task)
+                        if task.exception() is None:
+                            return task.result()
+                    if not tasks:
+                        raise done.pop().exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    for attempt_number in range(retries + 1):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            outcome["error"] = outcome["error"] or "исчерпан бюджет времени"
+            break
+
+        outcome["attempts"] += 1
+        attempt_start = loop.time()
+        timeout = remaining if attempt_timeout is None else min(attempt_timeout, remaining)
+        try:
+            status, size, attempt_consumers = await attempt(None if timeout == math.inf else timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+        except Exception as e:
+            # Ошибка разбора тела или потребителя при повторе не исчезнет
+            outcome["error"] = f"{type(e).__name__}: {e}"
+            break
+        else:
+            outcome["status"] = status
+            if status not in RETRYABLE_STATUSES:
+                outcome["ok"] = status < 400
+                outcome["size"] = size
+                outcome["consumers"] = attempt_consumers
+                outcome["error"] = None if outcome["ok"] else f"HTTP {status}"
+                if tracker is not None and outcome["ok"]:
+                    tracker.add(loop.time() - attempt_start)
+                break
+            outcome["error"] = f"HTTP {status}"
+
+        if attempt_number < retries:
+            # Экспоненциальная задержка с полным джиттером
+            pause = random.uniform(0, min(max_backoff, backoff * 2 ** attempt_number))
+            await asyncio.sleep(min(pause, max(0.0, deadline - loop.time())))
+
+    outcome["elapsed"] = loop.time() - start_time
+    if verbose:
+        if outcome["status"] is not None and outcome["error"] is None:
+            print(f"Завершена загрузка {name}, статус: {outcome['status']}")
+        else:
+            print(f"Ошибка при загрузке {name}: {outcome['error']}")
+    return outcome
+
+
+async def benchmark_tail_latency(count=1000, concurrency=50, slow_share=0.05, fast=0.02, slow=1.0):
+    """
+    Демонстрирует снижение p99 на локальном сервере с редкими медленными ответами
+
+    Сравниваются: без политики, таймаут попытки с повтором и хеджирование по p95.
+    """
+    async def handle(request):
+        await asyncio.sleep(slow if random.random() < slow_share else fast)
+        return web.Response(text="ok")
+
+    runner, base_url = await start_test_server([("/{i}", handle)])
+    print(f"\n=== БЕНЧМАРК ХВОСТОВЫХ ЗАДЕРЖЕК ({count} запросов, {slow_share:.0%} медленных по {slow} сек) ===")
+    print(f"{'политика':<22} {'p50':<8} {'p95':<8} {'p99':<8} {'ошибок':<7} {'дубликатов':<10}")
+
+    policies = [
+        ("без политики", dict(attempt_timeout=30, retries=0)),
+        ("таймаут 0.1 + повтор", dict(attempt_timeout=0.1, retries=3, backoff=0.01)),
+        ("хеджирование по p95", dict(attempt_timeout=30, retries=0, hedge_after="p95")),
+    ]
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=2 * concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for label, policy in policies:
+                tracker = LatencyTracker()
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(i):
+                    async with semaphore:
+                        return await fetch_with_policy(session, f"{base_url}/{i}", f"Запрос {i}",
+                                                       tracker=tracker, **policy)
+
+                outcomes = await asyncio.gather(*(one(i) for i in range(count)))
+                latencies = [o["elapsed"] for o in outcomes]
+                errors = sum(not o["ok"] for o in outcomes)
+                hedged = sum(o["hedged"] for o in outcomes)
+                print(f"{label:<22} {percentile(latencies, 50):<8.3f} {percentile(latencies, 95):<8.3f} "
+                      f"{percentile(latencies, 99):<8.3f} {errors:<7} {hedged:<10}")
+                results[label] = outcomes
+    finally:
+        await runner.cleanup()
+    return results
+
+
+async def start_test_server(routes, host="127.0.0.1"):
+    """
+    Запускает локальный aiohttp-сервер в текущем цикле событий
+
+    Параметры:
+    routes (list): список пар (путь, обработчик)
+
+    Возвращает:
+    tuple: (runner, базовый URL); остановка - await runner.cleanup()
+    """
+    app = web.Application()
+    for path, handler in routes:
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    return runner, f"http://{host}:{runner.addresses[0][1]}"
+
+
+async def benchmark_streaming_fetch(body_mb=(1, 16, 64)):
+    """
+    Сравнивает пиковую память и скорость fetch_url с буферизацией тела
+    и в потоковом режиме на локальном сервере с большими ответами
+    """
+    # Текст с многобайтовыми символами, чтобы проверить инкрементальный декодер
+    line = ("Привет, мир! Hello, world! " * 4 + "\n").encode("utf-8")
+    bodies = {mb: line * (mb * 1024 * 1024 // len(line)) for mb in body_mb}
+
+    async def handle(request):
+        body = memoryview(bodies[int(request.match_info["mb"])])
+        response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+        response.content_length = len(body)
+        await response.prepare(request)
+        for offset in range(0, len(body), STREAM_CHUNK_SIZE):
+            await response.write(body[offset:offset + STREAM_CHUNK_SIZE])
+        return response
+
+    runner, base_url = await start_test_server([("/{mb}", handle)])
+    print("\n=== БЕНЧМАРК ПОТОКОВОГО ЧТЕНИЯ ОТВЕТОВ ===")
+    print(f"{'МБ':<6} {'режим':<10} {'символов':<12} {'МБ/с':<9} {'пик памяти, МБ':<15}")
+    results = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            for mb in body_mb:
+                for stream in (False, True):
+                    consumers = [ByteCounter(), HashConsumer()] if stream else None
+                    tracemalloc.start()
+                    start_time = time.perf_counter()
+                    outcome = await fetch_url(session, f"{base_url}/{mb}", f"{mb} МБ",
+                                              stream=stream, consumers=consumers)
+                    chars = outcome["size"]
+                    elapsed = time.perf_counter() - start_time
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    mode = "поток" if stream else "буфер"
+                    print(f"{mb:<6} {mode:<10} {chars:<12} {mb / elapsed:<9.1f} {peak / 1024 / 1024:<15.2f}")
+                    results.append((mb, mode, chars, elapsed, peak))
+    finally:
+        await runner.cleanup()
+    return results
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в стиле HDR: логарифмические интервалы с
+    линейным делением внутри, относительная погрешность не хуже
+    1 / 2^precision_bits при фиксированной памяти
+
+    Значения хранятся в микросекундах.
+    """
+
+    def __init__(self, precision_bits=6):
+        self.precision_bits = precision_bits
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, micros):
+        exponent = max(0, micros.bit_length() - self.precision_bits)
+        return exponent, micros >> exponent
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1e6))
+        key = self._bucket(micros)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q):
+        """Верхняя граница интервала, в который попадает процентиль q, в секундах"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for exponent, mantissa in sorted(self.buckets):
+            seen += self.buckets[(exponent, mantissa)]
+            if seen >= rank:
+                upper = ((mantissa + 1) << exponent) - 1
+                return min(upper / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "min": self.min or 0.0,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max or 0.0,
+        }
+
+
+class RequestTimings:
+    """
+    Замеры фаз запросов через aiohttp.TraceConfig
+
+    Фазы: ожидание соединения в пуле, DNS, установка соединения
+    (для https включает TLS - aiohttp не выделяет рукопожатие отдельным
+    событием), время до первого байта ответа и передача тела.
+    Подключается через trace_configs=[timings.trace_config] у ClientSession.
+    """
+
+    PHASES = ("queue", "dns", "connect", "ttfb", "transfer", "total")
+
+    def __init__(self):
+        self.histograms = {phase: LatencyHistogram() for phase in self.PHASES}
+        self.requests = []
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_connection_queued_start.append(self._mark("queue_start"))
+        self.trace_config.on_connection_queued_end.append(self._mark("queue_end"))
+        self.trace_config.on_dns_resolvehost_start.append(self._mark("dns_start"))
+        self.trace_config.on_dns_resolvehost_end.append(self._mark("dns_end"))
+        self.trace_config.on_connection_create_start.append(self._mark("connect_start"))
+        self.trace_config.on_connection_create_end.append(self._mark("connect_end"))
+        self.trace_config.on_request_headers_sent.append(self._mark("headers_sent"))
+        self.trace_config.on_request_end.append(self._mark("response_start"))
+        self.trace_config.on_request_exception.append(self._mark("failed"))
+
+    async def _on_request_start(self, session, ctx, params):
+        # fetch_url передает словарь через trace_request_ctx и отмечает в нем body_end
+        ctx.events = ctx.trace_request_ctx if isinstance(ctx.trace_request_ctx, dict) else {}
+        ctx.events["start"] = time.perf_counter()
+        self.requests.append(ctx.events)
+
+    def _mark(self, event):
+        async def hook(session, ctx, params):
+            ctx.events[event] = time.perf_counter()
+        return hook
+
+    def _aggregate(self):
+        """Раскладывает еще не учтенные запросы по гистограммам"""
+        for events in self.requests:
+            if "failed" in events or "response_start" not in events:
+                continue
+            phases = {}
+            if "queue_end" in events:
+                phases["queue"] = events["queue_end"] - events["queue_start"]
+            if "dns_end" in events:
+                phases["dns"] = events["dns_end"] - events["dns_start"]
+            if "connect_end" in events:
+                phases["connect"] = events["connect_end"] - events["connect_start"] - phases.get("dns", 0)
+            phases["ttfb"] = events["response_start"] - events.get("headers_sent", events["start"])
+            end = events.get("body_end", events["response_start"])
+            phases["transfer"] = end - events["response_start"]
+            phases["total"] = end - events["start"]
+            for phase, value in phases.items():
+                self.histograms[phase].record(value)
+        self.requests = [events for events in self.requests if "response_start" not in events
+                         and "failed" not in events]
+
+    def summary(self):
+        """Сводка по фазам: count, min, mean, p50, p95, p99, max (секунды)"""
+        self._aggregate()
+        return {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+
+    def print_summary(self):
+        print(f"{'фаза':<10} {'запросов':<9} {'p50, мс':<9} {'p95, мс':<9} {'p99, мс':<9} {'max, мс':<9}")
+        for phase, row in self.summary().items():
+            print(f"{phase:<10} {row['count']:<9} {row['p50'] * 1e3:<9.1f} {row['p95'] * 1e3:<9.1f} "
+                  f"{row['p99'] * 1e3:<9.1f} {row['max'] * 1e3:<9.1f}")
+
+    def to_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def to_csv(self, path):
+        summary = self.summary()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["phase", "count", "min", "mean", "p50", "p95", "p99", "max"])
+            for phase, row in summary.items():
+                writer.writerow([phase, row["count"], row["min"], row["mean"], row["p50"],
+                                 row["p95"], row["p99"], row["max"]])
+
+
+async def crawl(urls, session=None, workers=100, connection_limit=100, limit_per_host=10,
+                queue_size=None, on_result=None, progress_every=None, stream=True, verbose=False,
+                cache=None, timings=None, policy=None):
+    """
+    Обходит URL ограниченным числом воркеров через asyncio.Queue
+
+    Вместо одной asyncio.gather на все URL производитель кладет их в
+    ограниченную очередь: когда воркеры не успевают, он ждет (обратное
+    давление), поэтому одновременно существует не больше workers запросов,
+    а результаты обрабатываются по мере готовности.
+
+    Параметры:
+    urls (iterable): пары (url, name); может быть генератором
+    session (aiohttp.ClientSession): готовая сессия; если не задана, создается
+        с TCPConnector(limit=connection_limit, limit_per_host=limit_per_host),
+        кэшем DNS и keep-alive
+    workers (int): число воркеров
+    queue_size (int): размер очереди (по умолчанию 2 * workers)
+    on_result (callable): on_result(index, url, name, size, ok) для каждого результата;
+        ok=False - ошибка загрузки или статус ошибки HTTP (пустое тело ошибкой не считается)
+    progress_every (int): печатать прогресс каждые N результатов (None - не печатать)
+    stream (bool): читать тела потоково (см. fetch_url)
+    verbose (bool): печатать начало и конец каждой загрузки
+    cache (HttpCache): дисковый кэш ответов (см. fetch_url)
+    timings (RequestTimings): сбор замеров фаз запросов (только для собственной сессии)
+    policy (dict): таймауты, повторы и хеджирование для fetch_with_policy
+        (None - одна попытка без таймаутов, как у fetch_url)
+
+    Возвращает:
+    dict: статистика обхода
+    """
+    queue = asyncio.Queue(maxsize=queue_size or 2 * workers)
+    stats = {"completed": 0, "errors": 0, "retries": 0, "total_size": 0}
+    start_time = time.perf_counter()
+    policy = {**SINGLE_ATTEMPT, **(policy or {})}
+
+    own_session = session is None
+    if own_session:
+        connector = aiohttp.TCPConnector(
+            limit=connection_limit,
+            limit_per_host=limit_per_host,
+            ttl_dns_cache=300,  # секунды хранения результатов DNS
+            keepalive_timeout=30,
+        )
+        # Ожидание свободного соединения в пуле не ограничиваем: при workers >
+        # limit_per_host часть воркеров законно ждет, и общий таймаут давал бы ложные ошибки
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+        trace_configs = [timings.trace_config] if timings is not None else None
+        session = aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            index, url, name = item
+            outcome = await fetch_with_policy(session, url, name, **policy, stream=stream,
+                                              verbose=verbose, cache=cache)
+            stats["completed"] += 1
+            if not outcome["ok"]:
+                stats["errors"] += 1
+            stats["retries"] += outcome["attempts"] - 1
+            stats["total_size"] += outcome["size"]
+            if on_result is not None:
+                on_result(index, url, name, outcome["size"], outcome["ok"])
+            if progress_every and stats["completed"] % progress_every == 0:
+                elapsed = time.perf_counter() - start_time
+                print(f"Обработано {stats['completed']} URL за {elapsed:.1f} сек "
+                      f"({stats['completed'] / elapsed:.0f} запросов/сек)")
+            queue.task_done()
+
+    async def produce():
+        for index, (url, name) in enumerate(urls):
+            await queue.put((index, url, name))  # ждет, если очередь заполнена
+        for _ in worker_tasks:
+            await queue.put(None)
+
+    worker_tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    producer = asyncio.create_task(produce())
+    try:
+        # Если воркер упал (например, в on_result), очередь никто не разбирает и
+        # производитель ждал бы вечно - поэтому ждем первого исключения от любого
+        done, _ = await asyncio.wait([producer, *worker_tasks], return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in [producer, *worker_tasks]:
+            task.cancel()
+        await asyncio.gather(producer, *worker_tasks, return_exceptions=True)
+        if own_session:
+            await session.close()
+
+    elapsed = time.perf_counter() - start_time
+    stats["elapsed"] = elapsed
+    stats["requests_per_sec"] = stats["completed"] / elapsed if elapsed > 0 else 0
+    return stats
+
+
+def _run_crawl_stub_server(conn, body_size):
+    """Процесс заглушки для бенчмарка обхода: отвечает body_size байт на любой путь"""
+    body = b"x" * body_size
+
+    async def handle(request):
+        return web.Response(body=body, content_type="text/plain")
+
+    async def serve():
+        runner, base_url = await start_test_server([("/{tail:.*}", handle)])
+        conn.send(base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def open_fd_count():
+    """Число открытых файловых дескрипторов процесса (None, если нет /proc)"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+async def benchmark_crawler(counts=(1000, 10000, 100000), workers=100, limit_per_host=100, body_size=1024):
+    """
+    Измеряет запросы в секунду и пик открытых сокетов при обходе очередью
+
+    Сервер-заглушка работает в отдельном процессе, поэтому прирост числа
+    открытых дескрипторов в этом процессе - это сокеты клиента.
+    """
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_run_crawl_stub_server, args=(child_conn, body_size), daemon=True)
+    server.start()
+    base_url = parent_conn.recv()
+
+    print(f"\n=== БЕНЧМАРК ОБХОДА ({workers} воркеров, до {limit_per_host} соединений на хост) ===")
+    print(f"{'URL':<8} {'время, сек':<11} {'запросов/сек':<13} {'ошибок':<7} {'пик сокетов':<12}")
+    results = []
+    try:
+        for count in counts:
+            baseline = open_fd_count()
+            peak = 0
+            done = asyncio.Event()
+
+            async def monitor():
+                nonlocal peak
+                while not done.is_set():
+                    current = open_fd_count()
+                    if current is not None and baseline is not None:
+                        peak = max(peak, current - baseline)
+                    await asyncio.sleep(0.01)
+
+            monitor_task = asyncio.create_task(monitor())
+            urls = ((f"{base_url}/page/{i}", f"Страница {i}") for i in range(count))
+            stats = await crawl(urls, workers=workers, connection_limit=workers, limit_per_host=limit_per_host)
+            done.set()
+            await monitor_task
+
+            sockets = peak if baseline is not None else "-"
+            print(f"{count:<8} {stats['elapsed']:<11.2f} {stats['requests_per_sec']:<13.0f} "
+                  f"{stats['errors']:<7} {sockets!s:<12}")
+            results.append((count, stats, peak))
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+
+async def benchmark_http_cache(count=2000, body_size=32 * 1024, workers=50):
+    """
+    Повторный обход с дисковым кэшем: второй проход получает ответы 304
+    и не передает тела
+    """
+    bodies = {i: (f"Страница {i}\n" * (body_size // 16)).encode("utf-8") for i in range(count)}
+    etags = {i: f'"{hashlib.sha256(body).hexdigest()[:16]}"' for i, body in bodies.items()}
+    transferred = {"bytes": 0}
+
+    async def handle(request):
+        i = int(request.match_info["i"])
+        if request.headers.get("If-None-Match") == etags[i]:
+            return web.Response(status=304, headers={"ETag": etags[i]})
+        transferred["bytes"] += len(bodies[i])
+        return web.Response(body=bodies[i], headers={"ETag": etags[i]},
+                            content_type="text/plain", charset="utf-8")
+
+    runner, base_url = await start_test_server([("/page/{i}", handle)])
+    print(f"\n=== БЕНЧМАРК ДИСКОВОГО КЭША ({count} URL по {body_size // 1024} КБ) ===")
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = HttpCache(cache_dir)
+            for attempt in ("первый", "повторный"):
+                transferred["bytes"] = 0
+                urls = [(f"{base_url}/page/{i}", f"Страница {i}") for i in range(count)]
+                stats = await crawl(urls, workers=workers, limit_per_host=workers, cache=cache)
+                print(f"{attempt.capitalize()} проход: {stats['elapsed']:.2f} сек, "
+                      f"передано тел {transferred['bytes'] / 1024 / 1024:.1f} МБ")
+            print(f"Статистика кэша: {cache.stats}")
+            print(f"Размер кэша: {cache.total_bytes() / 1024 / 1024:.1f} МБ")
+            cache.close()
+    finally:
+        await runner.cleanup()
+
+
+async def task4_async_scraper(max_workers=10, cache_dir=None, timings_path=None):
     """
     Задача: Создайте асинхронный веб-скрапер.
 
@@ -34,6 +1010,11 @@ async def task4_async_scraper():
     - Использовать aiohttp для HTTP запросов
     - Измерить общее время выполнения
     - Вывести размер загруженного контента для каждого сайта
+
+    Параметры:
+    max_workers (int): число одновременных загрузок
+    cache_dir (str): каталог дискового кэша ответов (None - без кэша)
+    timings_path (str): файл .json или .csv для выгрузки замеров фаз (None - не выгружать)
     """
     urls = [
         ("https://httpbin.org/delay/1", "Сайт 1"),
@@ -50,17 +1031,18 @@ async def task4_async_scraper():
     # TODO: Создайте задачи для каждого URL
     # TODO: Используйте asyncio.gather для параллельного выполнения
 
-    # Создаем ClientSession с таймаутом
-    timeout = aiohttp.ClientTimeout(total=30)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        # Создаем задачи для каждого URL
-        tasks = []
-        for url, name in urls:
-            task = fetch_url(session, url, name)
-            tasks.append(task)
+    # Обходим URL ограниченным числом воркеров; результаты раскладываем по позициям
+    results = [0] * len(urls)
+
+    def store_result(index, url, name, size, ok):
+        results[index] = size
 
-        # Запускаем все задачи параллельно и собираем результаты
-        results = await asyncio.gather(*tasks)
+    cache = HttpCache(cache_dir) if cache_dir is not None else None
+    timings = RequestTimings()
+    # Таймаут с запасом над самой долгой задержкой httpbin и повтор при сбоях
+    policy = {"attempt_timeout": 10.0, "budget": 30.0, "retries": 2}
+    await crawl(urls, workers=max_workers, on_result=store_result, stream=False, verbose=True,
+                cache=cache, timings=timings, policy=policy)
 
     end_time = time.time()
     total_time = end_time - start_time
@@ -81,28 +1063,27 @@ async def task4_async_scraper():
 
     print(f"\nОбщий размер всех загруженных данных: {total_size} символов")
 
-    # Теоретическое время синхронной загрузки
+    if cache is not None:
+        stats = cache.stats
+        print(f"Кэш: попаданий {stats['hits']} (перепроверено 304: {stats['revalidated']}), "
+              f"промахов {stats['misses']}, обновлено {stats['updated']}, "
+              f"вытеснено {stats['evictions']}, сэкономлено {stats['bytes_saved']} байт")
+        cache.close()
+
+    # Анализ по реальным замерам запросов
     print("\n" + "=" * 50)
     print("АНАЛИЗ ПРОИЗВОДИТЕЛЬНОСТИ:")
     print("=" * 50)
 
-    # Вычисляем теоретическое время синхронной загрузки
-    # (сумма всех задержек из URL)
-    delays = []
-    for url, _ in urls:
-        try:
-            # Извлекаем число из URL типа "https://httpbin.org/delay/2"
-            delay_str = url.split('/')[-1]
-            delay = float(delay_str)
-            delays.append(delay)
-        except (ValueError, IndexError):
-            delays.append(0)  # Если не удалось извлечь задержку
-
-    theoretical_sync_time = sum(delays)
+    summary = timings.summary()
+    timings.print_summary()
+
+    # Последовательная загрузка заняла бы сумму длительностей всех запросов
+    sequential_time = summary["total"]["mean"] * summary["total"]["count"]
     actual_async_time = total_time
-    speedup = theoretical_sync_time / actual_async_time if actual_async_time > 0 else 0
+    speedup = sequential_time / actual_async_time if actual_async_time > 0 else 0
 
-    print(f"Теоретическое время синхронной загрузки: {theoretical_sync_time:.1f} сек")
+    print(f"\nСумма длительностей запросов (оценка синхронной загрузки): {sequential_time:.2f} сек")
     print(f"Фактическое время асинхронной загрузки: {actual_async_time:.2f} сек")
 
     if speedup > 0:
@@ -112,6 +1093,17 @@ async def task4_async_scraper():
         else:
             print("Синхронная загрузка была бы эффективнее (возможно из-за накладных расходов)")
 
+    connect_share = summary["connect"]["mean"] * summary["connect"]["count"] / sequential_time if sequential_time else 0
+    transfer_share = summary["transfer"]["mean"] * summary["transfer"]["count"] / sequential_time if sequential_time else 0
+    print(f"Доля установки соединений: {connect_share:.1%}, доля передачи тел: {transfer_share:.1%}")
+
+    if timings_path is not None:
+        if timings_path.endswith(".csv"):
+            timings.to_csv(timings_path)
+        else:
+            timings.to_json(timings_path)
+        print(f"Замеры записаны в {timings_path}")
+
     return results
 
 
@@ -123,6 +1115,10 @@ async def main():
     try:
         results = await task4_async_scraper()
         print(f"\nИтоговые результаты: {results}")
+        await benchmark_streaming_fetch()
+        await benchmark_crawler()
+        await benchmark_http_cache()
+        await benchmark_tail_latency()
     except Exception as e:
         print(f"Произошла ошибка: {e}")
 
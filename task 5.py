@@ -3,6 +3,23 @@ import threading
 import multiprocessing
 import asyncio
 import concurrent.futures
+import csv
+import json
+import os
+import pickle
+import queue
+import random
+import statistics
+
+try:
+    import resource
+except ImportError:  # нет на Windows: память и переключения контекста не измеряются
+    resource = None
+
+try:
+    import uvloop
+except ImportError:  # без uvloop используется стандартный цикл событий
+    uvloop = None
 
 
 def io_task(name, duration):
@@ -17,6 +34,792 @@ async def async_io_task(name, duration):
     return f"{name} completed in {duration} seconds"
 
 
+def cpu_task(name, iterations):
+    """CPU-bound задача: чистые вычисления в интерпретаторе"""
+    total = 0
+    for i in range(iterations):
+        total += i * i % 7
+    return f"{name} computed {total}"
+
+
+def _runqueue_wait():
+    """
+    Сколько секунд текущий поток простоял в очереди планировщика ОС
+    (по /proc/thread-self/schedstat; 0.0, если счетчик недоступен)
+    """
+    try:
+        with open("/proc/thread-self/schedstat") as f:
+            return int(f.read().split()[1]) / 1e9
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def _measured_call(fn, args, kwargs):
+    """
+    Выполняет fn и возвращает (результат, процессорное время потока, реальное время)
+
+    Из реального времени вычитается ожидание свободного ядра: пока другие
+    процессы занимают процессор, вызов не работает и не ждет ввода-вывода,
+    и без поправки CPU-bound функция на загруженной машине выглядела бы I/O-bound.
+    """
+    wait_start = _runqueue_wait()
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    wall_time = time.perf_counter() - wall_start - (_runqueue_wait() - wait_start)
+    return result, time.thread_time() - cpu_start, max(wall_time, 0.0)
+
+
+EVENT_LOOPS = ("auto", "stdlib", "uvloop")
+
+
+def select_event_loop(name="auto"):
+    """
+    Выбирает реализацию цикла событий
+
+    Параметры:
+    name (str): 'stdlib' - стандартный asyncio, 'uvloop' - uvloop,
+        'auto' - uvloop, если установлен, иначе стандартный
+
+    Возвращает:
+    tuple: (имя выбранного цикла, фабрика нового цикла событий);
+        если uvloop запрошен, но не установлен, возвращается стандартный цикл
+    """
+    if name not in EVENT_LOOPS:
+        raise ValueError(f"Неизвестный цикл событий: {name}")
+    if name != "stdlib" and uvloop is not None:
+        return "uvloop", uvloop.new_event_loop
+    if name == "uvloop":
+        print("uvloop не установлен, используется стандартный цикл событий")
+    return "stdlib", asyncio.new_event_loop
+
+
+def run_async(coro, loop="auto"):
+    """Аналог asyncio.run с выбором цикла событий через select_event_loop"""
+    _, loop_factory = select_event_loop(loop)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
+
+
+class HybridExecutor:
+    """
+    Исполнитель, направляющий каждую задачу в подходящую среду:
+    корутины - в цикл событий в фоновом потоке, I/O-bound - в пул потоков,
+    CPU-bound - в пул процессов
+
+    Тип задачи берется из подсказки hint ('io', 'cpu', 'async'). Без
+    подсказки задача идет в пул потоков, а при auto_classify=True ее тип
+    определяет онлайн-классификатор: первые probe_runs вызовов функции
+    выполняются в пуле процессов с замером доли процессорного времени от
+    реального, и при доле не ниже cpu_threshold функция считается CPU-bound.
+    Замер в отдельном процессе не зависит от GIL родителя, но ядра он делит
+    с потоками исполнителя и другими процессами, поэтому одновременно идет
+    не больше замеров, чем ядер, а время ожидания ядра в очереди
+    планировщика из реального времени вычитается (см. _measured_call).
+    Пока замеры не готовы, остальные вызовы идут в пул потоков.
+
+    Замер - настоящий вызов в дочернем процессе: изменения глобального
+    состояния и объектов-аргументов в родителе не видны. Поэтому
+    классификатор включается явно и подходит только для функций без
+    побочных эффектов в памяти; вызовы с аргументами, которые нельзя
+    передать в процесс, выполняются в потоках без замера.
+    Пулы создаются при первом использовании и остаются «теплыми» до shutdown().
+
+    Параметры:
+    thread_workers (int): размер пула потоков
+    process_workers (int): размер пула процессов (по умолчанию - число ядер)
+    auto_classify (bool): определять тип задач без подсказки замерами в процессах
+    cpu_threshold (float): порог доли процессорного времени
+    probe_runs (int): сколько замеров нужно для классификации функции
+    """
+
+    def __init__(self, thread_workers=32, process_workers=None, auto_classify=False, cpu_threshold=0.5,
+                 probe_runs=3):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.auto_classify = auto_classify
+        self.cpu_threshold = cpu_threshold
+        self.probe_runs = probe_runs
+        self.probe_slots = process_workers or os.cpu_count() or 1
+        self._thread_pool = None
+        self._process_pool = None
+        self._loop = None
+        self._loop_thread = None
+        self._lock = threading.Lock()
+        self._profiles = {}  # функция -> [число замеров, процессорное время, реальное время]
+        self._probing = {}  # функция -> число замеров в работе
+        self.routes = {"async": 0, "io": 0, "cpu": 0}
+
+    def _get_thread_pool(self):
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_workers)
+            return self._thread_pool
+
+    def _get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._process_pool
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = select_event_loop()[1]()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def classify(self, fn):
+        """Тип функции по замерам: 'cpu', 'io' или None, если замеров пока мало"""
+        with self._lock:
+            profile = self._profiles.get(fn)
+        if profile is None or profile[0] < self.probe_runs:
+            return None
+        runs, cpu_time, wall_time = profile
+        return "cpu" if wall_time > 0 and cpu_time / wall_time >= self.cpu_threshold else "io"
+
+    def _record(self, fn, cpu_time, wall_time):
+        with self._lock:
+            profile = self._profiles.setdefault(fn, [0, 0.0, 0.0])
+            profile[0] += 1
+            profile[1] += cpu_time
+            profile[2] += wall_time
+
+    def submit(self, fn, *args, hint=None, **kwargs):
+        """
+        Запускает fn(*args, **kwargs) и возвращает concurrent.futures.Future
+
+        Параметры:
+        hint (str): 'async', 'io', 'cpu' или None - определить автоматически
+        """
+        if hint is None and asyncio.iscoroutinefunction(fn):
+            hint = "async"
+        if hint not in (None, "async", "io", "cpu"):
+            raise ValueError(f"Неизвестная подсказка: {hint}")
+
+        if hint == "async":
+            self.routes["async"] += 1
+            return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), self._get_loop())
+
+        route = hint or self.classify(fn)
+        if route is None and self.auto_classify and self._start_probe(fn, args, kwargs):
+            return self._submit_probe(fn, args, kwargs)
+
+        route = route or "io"
+        self.routes[route] += 1
+        pool = self._get_process_pool() if route == "cpu" else self._get_thread_pool()
+        return pool.submit(fn, *args, **kwargs)
+
+    def _start_probe(self, fn, args, kwargs):
+        """
+        Резервирует замер для вызова, если замеров функции еще не хватает,
+        свободно ядро и вызов можно передать в процесс
+        """
+        with self._lock:
+            runs = self._profiles.get(fn, [0])[0]
+            in_flight = self._probing.get(fn, 0)
+            if runs + in_flight >= self.probe_runs or sum(self._probing.values()) >= self.probe_slots:
+                return False
+            try:
+                pickle.dumps(fn)
+            except Exception:
+                # Функцию нельзя передать в процесс - она всегда выполняется в потоках
+                self._profiles[fn] = [self.probe_runs, 0.0, 1.0]
+                return False
+            try:
+                pickle.dumps((args, kwargs))
+            except Exception:
+                return False  # этот вызов - в потоках, замер достанется следующему
+            self._probing[fn] = in_flight + 1
+            return True
+
+    def _submit_probe(self, fn, args, kwargs):
+        """Выполняет вызов в пуле процессов с замером времени"""
+        self.routes["cpu"] += 1
+        outer = concurrent.futures.Future()
+        inner = self._get_process_pool().submit(_measured_call, fn, args, kwargs)
+
+        def unpack(future):
+            with self._lock:
+                self._probing[fn] -= 1
+            try:
+                result, cpu_time, wall_time = future.result()
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            self._record(fn, cpu_time, wall_time)
+            outer.set_result(result)
+
+        inner.add_done_callback(unpack)
+        return outer
+
+    def map(self, fn, *iterables, hint=None):
+        """Аналог Executor.map: результаты в порядке входа"""
+        futures = [self.submit(fn, *args, hint=hint) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """Останавливает пулы и цикл событий"""
+        with self._lock:
+            thread_pool, process_pool = self._thread_pool, self._process_pool
+            loop, loop_thread = self._loop, self._loop_thread
+            self._thread_pool = self._process_pool = self._loop = self._loop_thread = None
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=wait)
+        if process_pool is not None:
+            process_pool.shutdown(wait=wait)
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def benchmark_hybrid_executor(io_count=20, io_duration=0.2, cpu_count=6, cpu_iterations=2_000_000):
+    """
+    Сравнивает гибридный исполнитель с чистыми стратегиями на смешанном
+    наборе I/O-bound (io_task) и CPU-bound (cpu_task) задач
+    """
+    io_jobs = [(f"IO{i}", io_duration) for i in range(io_count)]
+    cpu_jobs = [(f"CPU{i}", cpu_iterations) for i in range(cpu_count)]
+    print(f"\n=== БЕНЧМАРК ГИБРИДНОГО ИСПОЛНИТЕЛЯ ({io_count} I/O + {cpu_count} CPU задач) ===")
+
+    def run_sync():
+        for job in io_jobs:
+            io_task(*job)
+        for job in cpu_jobs:
+            cpu_task(*job)
+
+    def run_threads():
+        with concurrent.futures.ThreadPoolExecutor(max_workers=io_count + cpu_count) as executor:
+            futures = [executor.submit(io_task, *job) for job in io_jobs]
+            futures += [executor.submit(cpu_task, *job) for job in cpu_jobs]
+            [future.result() for future in futures]
+
+    def run_processes():
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            futures = [executor.submit(io_task, *job) for job in io_jobs]
+            futures += [executor.submit(cpu_task, *job) for job in cpu_jobs]
+            [future.result() for future in futures]
+
+    def run_asyncio():
+        async def main():
+            io = asyncio.gather(*(async_io_task(*job) for job in io_jobs))
+            await asyncio.sleep(0)  # даем I/O-задачам стартовать
+            for job in cpu_jobs:
+                cpu_task(*job)  # CPU-bound задачи блокируют цикл событий
+            await io
+        asyncio.run(main())
+
+    def run_hybrid(executor, hinted):
+        futures = [executor.submit(async_io_task if hinted else io_task, *job) for job in io_jobs]
+        futures += [executor.submit(cpu_task, *job, hint="cpu" if hinted else None) for job in cpu_jobs]
+        [future.result() for future in futures]
+
+    strategies = [
+        ("Синхронно", run_sync),
+        ("Только потоки", run_threads),
+        ("Только процессы", run_processes),
+        ("Только asyncio", run_asyncio),
+    ]
+    results = []
+    for label, run in strategies:
+        start_time = time.perf_counter()
+        run()
+        results.append((label, time.perf_counter() - start_time))
+
+    with HybridExecutor(auto_classify=True) as executor:
+        run_hybrid(executor, hinted=True)  # прогрев пулов
+        start_time = time.perf_counter()
+        run_hybrid(executor, hinted=True)
+        results.append(("Гибрид, подсказки", time.perf_counter() - start_time))
+
+        # Классификатор: первые вызовы уходят на замеры (не больше одного на ядро),
+        # затем функции маршрутизируются
+        for _ in range(2 * executor.probe_runs):
+            if executor.classify(io_task) and executor.classify(cpu_task):
+                break
+            run_hybrid(executor, hinted=False)
+        start_time = time.perf_counter()
+        run_hybrid(executor, hinted=False)
+        results.append(("Гибрид, классификатор", time.perf_counter() - start_time))
+        classified = {fn.__name__: executor.classify(fn) for fn in (io_task, cpu_task)}
+
+    for label, elapsed in results:
+        print(f"{label:<24} {elapsed:.2f} сек")
+    print(f"Классификация: {classified}")
+    return results
+
+
+def threaded_ordered_map(fn, jobs, max_workers=32):
+    """
+    Выполняет задачи пулом потоков и собирает результаты в порядке подачи
+
+    Результаты пишутся в заранее выделенные ячейки по индексу задачи: каждая
+    ячейка принадлежит одной задаче, поэтому общая блокировка на список не
+    нужна, а порядок результатов совпадает с порядком jobs независимо от
+    порядка завершения.
+
+    Параметры:
+    fn (callable): функция задачи
+    jobs (list): кортежи аргументов для fn
+    max_workers (int): число потоков пула
+
+    Возвращает:
+    tuple: (результаты, ожидание в очереди по задачам, время выполнения по задачам);
+        если задача упала, в ее ячейке лежит исключение
+    """
+    count = len(jobs)
+    results = [None] * count
+    queue_waits = [0.0] * count
+    run_times = [0.0] * count
+    pending = queue.SimpleQueue()
+
+    def worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            index, submitted = item
+            started = time.perf_counter()
+            try:
+                results[index] = fn(*jobs[index])
+            except Exception as e:
+                results[index] = e
+            queue_waits[index] = started - submitted
+            run_times[index] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(max_workers, count) or 1)]
+    for thread in threads:
+        thread.start()
+    for index in range(count):
+        pending.put((index, time.perf_counter()))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    return results, queue_waits, run_times
+
+
+def tiny_task(value):
+    """Минимальная задача для замера накладных расходов на запуск и сбор результата"""
+    return value * value
+
+
+def lock_append_threads(fn, jobs):
+    """Исходный подход task5: поток на задачу и добавление результата под общей блокировкой"""
+    results = []
+    results_lock = threading.Lock()
+
+    def thread_worker(*args):
+        result = fn(*args)
+        with results_lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=thread_worker, args=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def lock_append_pool(fn, jobs, max_workers=32):
+    """Пул потоков, но результаты по-прежнему добавляются под общей блокировкой"""
+    results = []
+    results_lock = threading.Lock()
+
+    def pooled_worker(*args):
+        result = fn(*args)
+        with results_lock:
+            results.append(result)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for job in jobs:
+            executor.submit(pooled_worker, *job)
+    return results
+
+
+def benchmark_ordered_threads(counts=(10000, 100000), max_workers=32):
+    """
+    Сравнивает сбор результатов с блокировкой и по ячейкам на множестве мелких задач
+    """
+    print(f"\n=== БЕНЧМАРК СБОРА РЕЗУЛЬТАТОВ ПОТОКОВ ({max_workers} потоков в пуле) ===")
+    print(f"{'Задач':>7} {'Подход':<28} {'Время':>8} {'мкс/зад.':>9} {'Порядок':>8}")
+    report = []
+    for count in counts:
+        jobs = [(i,) for i in range(count)]
+        expected = [tiny_task(*job) for job in jobs]
+        approaches = [
+            ("Поток на задачу + блокировка", lambda: lock_append_threads(tiny_task, jobs)),
+            ("Пул + блокировка", lambda: lock_append_pool(tiny_task, jobs, max_workers)),
+            ("Пул + ячейки по индексу", lambda: threaded_ordered_map(tiny_task, jobs, max_workers)[0]),
+        ]
+        for label, run in approaches:
+            start_time = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start_time
+            ordered = results == expected
+            print(f"{count:>7} {label:<28} {elapsed:>8.3f} {elapsed / count * 1e6:>9.2f} "
+                  f"{'да' if ordered else 'нет':>8}")
+            report.append({"tasks": count, "approach": label, "time": elapsed, "ordered": ordered})
+
+        _, queue_waits, run_times = threaded_ordered_map(tiny_task, jobs, max_workers)
+        waits = sorted(queue_waits)
+        print(f"        ожидание в очереди: медиана {statistics.median(waits) * 1e3:.2f} мс, "
+              f"p99 {waits[int(0.99 * (count - 1))] * 1e3:.2f} мс; "
+              f"выполнение: медиана {statistics.median(run_times) * 1e6:.2f} мкс")
+    return report
+
+
+async def noop():
+    """Пустая корутина для замера накладных расходов цикла событий"""
+    return None
+
+
+async def _measure_coroutine_creation(n):
+    start = time.perf_counter_ns()
+    coros = [noop() for _ in range(n)]
+    elapsed = time.perf_counter_ns() - start
+    for coro in coros:
+        coro.close()
+    return elapsed
+
+
+async def _measure_gather(n):
+    start = time.perf_counter_ns()
+    await asyncio.gather(*(noop() for _ in range(n)))
+    return time.perf_counter_ns() - start
+
+
+async def _measure_task_creation(n):
+    start = time.perf_counter_ns()
+    tasks = [asyncio.create_task(noop()) for _ in range(n)]
+    elapsed = time.perf_counter_ns() - start
+    await asyncio.wait(tasks)
+    return elapsed
+
+
+async def _measure_sleep_switch(n):
+    # Две корутины по очереди уступают управление: n переключений в сумме
+    async def yielder(count):
+        for _ in range(count):
+            await asyncio.sleep(0)
+
+    start = time.perf_counter_ns()
+    await asyncio.gather(yielder(n // 2), yielder(n - n // 2))
+    return time.perf_counter_ns() - start
+
+
+EVENT_LOOP_MICROBENCHMARKS = (
+    ("Создание корутин", _measure_coroutine_creation),
+    ("gather", _measure_gather),
+    ("create_task", _measure_task_creation),
+    ("sleep(0)", _measure_sleep_switch),
+)
+
+
+def benchmark_event_loop(sizes=(1000, 10000, 100000, 1000000), loops=("stdlib", "uvloop"), repeats=3):
+    """
+    Микробенчмарки цикла событий: стоимость создания корутин, gather,
+    создания Task и переключения через sleep(0) в наносекундах на операцию
+
+    Параметры:
+    sizes (tuple): числа операций
+    loops (tuple): циклы событий для сравнения (недоступные пропускаются)
+    repeats (int): число замеров, берется минимум
+
+    Возвращает:
+    list[dict]: записи (цикл, операция, число операций, нс на операцию)
+    """
+    print("\n=== МИКРОБЕНЧМАРКИ ЦИКЛА СОБЫТИЙ ===")
+    selected = []
+    for name in loops:
+        label, loop_factory = select_event_loop(name)
+        if label != name:
+            continue
+        selected.append((label, loop_factory))
+
+    report = []
+    print(f"{'Цикл':<8} {'Операция':<18} {'N':>9} {'нс/оп.':>9}")
+    for label, loop_factory in selected:
+        for op_name, measure in EVENT_LOOP_MICROBENCHMARKS:
+            for n in sizes:
+                with asyncio.Runner(loop_factory=loop_factory) as runner:
+                    best = min(runner.run(measure(n)) for _ in range(repeats))
+                per_op = best / n
+                print(f"{label:<8} {op_name:<18} {n:>9} {per_op:>9.0f}")
+                report.append({"loop": label, "operation": op_name, "n": n, "ns_per_op": per_op})
+
+    # Потолок одного цикла: сколько переключений в секунду он выдерживает
+    for label, _ in selected:
+        switch = [r["ns_per_op"] for r in report if r["loop"] == label and r["operation"] == "sleep(0)"]
+        if switch:
+            print(f"{label}: ~{1e9 / min(switch):,.0f} переключений/сек на одном ядре")
+    return report
+
+
+SCALABILITY_STRATEGIES = ("sync", "thread", "process", "asyncio")
+DURATION_DISTRIBUTIONS = ("fixed", "uniform", "heavy")
+
+
+def make_workload(count, total_work, distribution="fixed", io_share=1.0, seed=42):
+    """
+    Генерирует набор задач для бенчмарка масштабируемости
+
+    Параметры:
+    count (int): число задач
+    total_work (float): суммарная длительность всех задач в секундах (в среднем);
+        средняя длительность задачи = total_work / count, поэтому время
+        последовательного выполнения не зависит от числа задач
+    distribution (str): 'fixed' - одинаковые, 'uniform' - равномерно от 0 до
+        2x среднего, 'heavy' - распределение Парето (alpha=1.5) с тем же средним
+    io_share (float): доля I/O-bound задач (остальные - CPU-bound)
+    seed (int): зерно генератора для воспроизводимости
+
+    Возвращает:
+    list: кортежи (вид задачи 'io'/'cpu', длительность в секундах)
+    """
+    if distribution not in DURATION_DISTRIBUTIONS:
+        raise ValueError(f"Неизвестное распределение: {distribution}")
+    rng = random.Random(seed)
+    mean = total_work / count
+    alpha = 1.5
+    tasks = []
+    for _ in range(count):
+        if distribution == "fixed":
+            duration = mean
+        elif distribution == "uniform":
+            duration = rng.uniform(0, 2 * mean)
+        else:
+            # Ограничиваем хвост, чтобы одна задача не определяла весь прогон
+            duration = min(rng.paretovariate(alpha) * mean * (alpha - 1) / alpha, 100 * mean)
+        kind = "io" if rng.random() < io_share else "cpu"
+        tasks.append((kind, duration))
+    return tasks
+
+
+def scalability_task(kind, duration):
+    """
+    Задача бенчмарка: 'io' - сон, 'cpu' - вычисления до расхода duration
+    секунд процессорного времени потока (не зависит от конкуренции за GIL)
+    """
+    if kind == "io":
+        time.sleep(duration)
+        return duration
+    deadline = time.thread_time() + duration
+    x = 0
+    while time.thread_time() < deadline:
+        x += 1
+    return duration
+
+
+async def async_scalability_task(kind, duration):
+    """Асинхронный вариант scalability_task: CPU-часть выполняется в цикле событий"""
+    if kind == "io":
+        await asyncio.sleep(duration)
+        return duration
+    return scalability_task(kind, duration)
+
+
+def run_strategy(strategy, tasks, workers):
+    """
+    Выполняет набор задач выбранной стратегией
+
+    Параметры:
+    strategy (str): 'sync', 'thread', 'process' или 'asyncio'
+    tasks (list): кортежи (вид, длительность) из make_workload
+    workers (int): число потоков/процессов или предел одновременных корутин
+    """
+    if strategy == "sync":
+        for task in tasks:
+            scalability_task(*task)
+    elif strategy == "thread":
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(scalability_task, *zip(*tasks)))
+    elif strategy == "process":
+        # Пачки снижают число обращений к очереди пула на десятках тысяч задач
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(scalability_task, *zip(*tasks), chunksize=chunksize))
+    elif strategy == "asyncio":
+        async def main():
+            semaphore = asyncio.Semaphore(workers)
+
+            async def limited(kind, duration):
+                async with semaphore:
+                    return await async_scalability_task(kind, duration)
+
+            await asyncio.gather(*(limited(*task) for task in tasks))
+        run_async(main())
+    else:
+        raise ValueError(f"Неизвестная стратегия: {strategy}")
+
+
+def ideal_makespan(strategy, tasks, workers, cpus=None):
+    """
+    Оценка времени выполнения без накладных расходов: I/O распараллеливается
+    на все рабочие единицы стратегии, CPU - только на процессы (не больше
+    числа ядер); остальные стратегии выполняют CPU-задачи по одной из-за GIL
+    """
+    cpus = cpus or os.cpu_count() or 1
+    io_work = sum(d for kind, d in tasks if kind == "io")
+    cpu_work = sum(d for kind, d in tasks if kind == "cpu")
+    longest = max((d for _, d in tasks), default=0.0)
+    io_parallel = {"sync": 1, "asyncio": min(workers, len(tasks))}.get(strategy, workers)
+    cpu_parallel = min(workers, cpus) if strategy == "process" else 1
+    return max(longest, io_work / io_parallel + cpu_work / cpu_parallel)
+
+
+def _rusage_snapshot():
+    """Процессорное время, пиковая память (МБ) и переключения контекста процесса и его потомков"""
+    if resource is None:
+        return {"cpu_time": time.process_time(), "peak_rss_mb": None,
+                "voluntary_switches": None, "involuntary_switches": None}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # На Linux ru_maxrss в КБ, на macOS - в байтах
+    scale = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+    return {
+        "cpu_time": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        "peak_rss_mb": max(own.ru_maxrss, children.ru_maxrss) / scale,
+        "voluntary_switches": own.ru_nvcsw + children.ru_nvcsw,
+        "involuntary_switches": own.ru_nivcsw + children.ru_nivcsw,
+    }
+
+
+def _measure_run(conn, strategy, tasks, workers):
+    """Замер одного прогона в отдельном процессе, чтобы пиковая память не накапливалась между прогонами"""
+    before = _rusage_snapshot()
+    start_time = time.perf_counter()
+    run_strategy(strategy, tasks, workers)
+    wall = time.perf_counter() - start_time
+    after = _rusage_snapshot()
+    record = {"wall_time": wall, "cpu_time": after["cpu_time"] - before["cpu_time"],
+              "peak_rss_mb": after["peak_rss_mb"]}
+    for key in ("voluntary_switches", "involuntary_switches"):
+        record[key] = None if after[key] is None else after[key] - before[key]
+    conn.send(record)
+    conn.close()
+
+
+def measure_strategy(strategy, tasks, workers):
+    """
+    Выполняет набор задач стратегией в свежем процессе и возвращает замеры
+
+    Возвращает:
+    dict: wall_time, cpu_time, peak_rss_mb, voluntary_switches, involuntary_switches
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_measure_run, args=(child_conn, strategy, tasks, workers))
+    process.start()
+    child_conn.close()
+    try:
+        record = parent_conn.recv()
+    except EOFError:
+        raise RuntimeError(f"Процесс замера стратегии {strategy} завершился с кодом {process.exitcode}")
+    finally:
+        process.join()
+    return record
+
+
+def write_scalability_results(records, path_prefix):
+    """Записывает записи бенчмарка в <path_prefix>.json и <path_prefix>.csv"""
+    with open(path_prefix + ".json", "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    with open(path_prefix + ".csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    print(f"Результаты записаны в {path_prefix}.json и {path_prefix}.csv")
+
+
+def benchmark_scalability(counts=(10, 1000, 100000), distributions=DURATION_DISTRIBUTIONS,
+                          worker_counts=(8,), io_shares=(1.0, 0.0), strategies=SCALABILITY_STRATEGIES,
+                          total_work=0.5, repeats=3, path_prefix=None):
+    """
+    Параметрический бенчмарк масштабируемости стратегий task5
+
+    Перебирает число задач, распределение длительностей, число рабочих и
+    долю I/O-bound задач; каждую стратегию запускает repeats раз, каждый раз
+    в свежем процессе. Для каждой записи сохраняются медианы времени
+    (реального и процессорного), пиковая память, переключения контекста и
+    накладные расходы на задачу относительно ideal_makespan.
+
+    Параметры:
+    counts, distributions, worker_counts, io_shares, strategies: оси перебора
+    total_work (float): суммарная длительность задач одного прогона в секундах
+    repeats (int): число повторов каждой конфигурации
+    path_prefix (str): префикс файлов .json/.csv для результатов (None - не записывать)
+
+    Возвращает:
+    list[dict]: по записи на конфигурацию и стратегию
+    """
+    print(f"\n=== БЕНЧМАРК МАСШТАБИРУЕМОСТИ (работа {total_work} сек на прогон, повторов: {repeats}) ===")
+    records = []
+    for count in counts:
+        for distribution in distributions:
+            for io_share in io_shares:
+                tasks = make_workload(count, total_work, distribution, io_share)
+                for workers in worker_counts:
+                    for strategy in strategies:
+                        runs = [measure_strategy(strategy, tasks, workers) for _ in range(repeats)]
+                        wall = statistics.median(run["wall_time"] for run in runs)
+                        ideal = ideal_makespan(strategy, tasks, workers)
+                        record = {
+                            "strategy": strategy,
+                            "tasks": count,
+                            "distribution": distribution,
+                            "io_share": io_share,
+                            "workers": workers,
+                            "repeats": repeats,
+                            "wall_time": wall,
+                            "wall_time_min": min(run["wall_time"] for run in runs),
+                            "wall_time_max": max(run["wall_time"] for run in runs),
+                            "cpu_time": statistics.median(run["cpu_time"] for run in runs),
+                            "ideal_time": ideal,
+                            "overhead_per_task_us": max(0.0, wall - ideal) / count * 1e6,
+                        }
+                        rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+                        record["peak_rss_mb"] = max(rss) if rss else None
+                        for key in ("voluntary_switches", "involuntary_switches"):
+                            values = [run[key] for run in runs if run[key] is not None]
+                            record[key] = statistics.median(values) if values else None
+                        records.append(record)
+
+    print(f"\n{'Стратегия':<10} {'Задач':>7} {'Распр.':<8} {'I/O':>4} {'Раб.':>4} "
+          f"{'Время':>8} {'CPU':>8} {'Идеал':>8} {'мкс/зад.':>9} {'RSS МБ':>7} {'Перекл.':>9}")
+    print("-" * 94)
+    for r in records:
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        switches = (f"{r['voluntary_switches'] + r['involuntary_switches']:.0f}"
+                    if r["voluntary_switches"] is not None else "-")
+        print(f"{r['strategy']:<10} {r['tasks']:>7} {r['distribution']:<8} {r['io_share']:>4.1f} "
+              f"{r['workers']:>4} {r['wall_time']:>8.3f} {r['cpu_time']:>8.3f} {r['ideal_time']:>8.3f} "
+              f"{r['overhead_per_task_us']:>9.1f} {rss:>7} {switches:>9}")
+
+    # Лучшая стратегия для каждой конфигурации - по данным, а не по общим рассуждениям
+    print("\nЛучшая стратегия по конфигурациям:")
+    best = {}
+    for r in records:
+        key = (r["tasks"], r["distribution"], r["io_share"], r["workers"])
+        if key not in best or r["wall_time"] < best[key]["wall_time"]:
+            best[key] = r
+    for (count, distribution, io_share, workers), r in best.items():
+        print(f"  {count} задач, {distribution}, I/O {io_share:.0%}, {workers} раб.: "
+              f"{r['strategy']} ({r['wall_time']:.3f} сек)")
+
+    if path_prefix is not None:
+        write_scalability_results(records, path_prefix)
+    return records
+
+
 def task5_performance_comparison():
     """
     Задача: Сравните производительность разных подходов.
@@ -65,27 +868,12 @@ def task5_performance_comparison():
     print("\n=== 2. МНОГОПОТОЧНОЕ ВЫПОЛНЕНИЕ ===")
     start_time = time.time()
 
-    thread_results = []
-    threads = []
-    results_lock = threading.Lock()
-
-    # Функция-обертка для потока
-    def thread_worker(name, duration):
-        result = io_task(name, duration)
-        with results_lock:
-            thread_results.append(result)
-        print(f"Завершен поток для {name}: {result}")
-
-    # Создаем и запускаем потоки
-    for name, duration in tasks:
-        print(f"Создание потока для {name} (длительность: {duration} сек)")
-        thread = threading.Thread(target=thread_worker, args=(name, duration))
-        threads.append(thread)
-        thread.start()
-
-    # Ждем завершения всех потоков
-    for thread in threads:
-        thread.join()
+    # Пул потоков пишет результаты в ячейки по индексу: без общей блокировки,
+    # порядок результатов совпадает с порядком задач
+    print(f"Запуск {len(tasks)} задач в пуле потоков")
+    thread_results, queue_waits, run_times = threaded_ordered_map(io_task, tasks, max_workers=len(tasks))
+    for (name, _), result, wait, run in zip(tasks, thread_results, queue_waits, run_times):
+        print(f"Завершено {name}: {result} (ожидание {wait * 1000:.1f} мс, выполнение {run:.2f} сек)")
 
     thread_time = time.time() - start_time
     print(f"Общее время многопоточного выполнения: {thread_time:.2f} сек")
@@ -94,12 +882,13 @@ def task5_performance_comparison():
     print("\n=== 3. МНОГОПРОЦЕССНОЕ ВЫПОЛНЕНИЕ ===")
     start_time = time.time()
 
-    # Используем ProcessPoolExecutor для удобства
-    with concurrent.futures.ProcessPoolExecutor(max_workers=5) as executor:
+    # Гибридный исполнитель с теплым пулом процессов; подсказка 'cpu' направляет
+    # задачи именно в процессы - этот раздел сравнивает многопроцессное выполнение
+    with HybridExecutor(process_workers=5) as executor:
         print("Создание процессов...")
         # Подготавливаем задачи для процессов
         future_to_task = {
-            executor.submit(io_task, name, duration): (name, duration)
+            executor.submit(io_task, name, duration, hint="cpu"): (name, duration)
             for name, duration in tasks
         }
 
@@ -129,9 +918,11 @@ def task5_performance_comparison():
 
         return await asyncio.gather(*async_tasks)
 
+    loop_name, _ = select_event_loop()
+    print(f"Цикл событий: {loop_name}")
     start_time = time.time()
     # Запускаем асинхронные задачи
-    async_results = asyncio.run(run_async_tasks())
+    async_results = run_async(run_async_tasks())
     async_time = time.time() - start_time
 
     print(f"Общее время асинхронного выполнения: {async_time:.2f} сек")
@@ -219,4 +1010,8 @@ def task5_performance_comparison():
 
 # Запуск задачи
 if __name__ == "__main__":
-    results = task5_performance_comparison()
\ No newline at end of file
+    results = task5_performance_comparison()
+    benchmark_hybrid_executor()
+    benchmark_ordered_threads()
+    benchmark_event_loop()
+    benchmark_scalability()
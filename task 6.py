@@ -1,4 +1,14 @@
 import asyncio
+import collections
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
 import time
 from datetime import datetime
 from typing import List, Tuple
@@ -19,7 +29,1007 @@ async def scheduled_task(name, priority, duration):
     return f"Результат {name}"
 
 
-async def task6_async_scheduler():
+class SchedulingPolicy:
+    """
+    Политика планирования: вычисляет ключ задачи для кучи (меньше - раньше)
+
+    Ключ считается один раз при добавлении, поэтому вставка остается O(log n).
+    Политики с состоянием обновляют его в on_dispatch и сбрасывают в reset.
+    """
+
+    name = "base"
+
+    def key(self, priority, duration, deadline, now):
+        """
+        Параметры:
+        priority (int): приоритет (меньше - важнее)
+        duration (float): ожидаемая длительность (None - неизвестна)
+        deadline (float): абсолютный срок завершения (None - без срока)
+        now (float): момент добавления
+        """
+        raise NotImplementedError
+
+    def on_dispatch(self, key):
+        """Вызывается, когда задача с ключом key выдана рабочему"""
+
+    def reset(self):
+        """Сбрасывает состояние перед новым прогоном"""
+
+
+class StrictPriorityPolicy(SchedulingPolicy):
+    """Строгий приоритет, внутри приоритета - порядок добавления"""
+
+    name = "priority"
+
+    def key(self, priority, duration, deadline, now):
+        return (priority,)
+
+
+class ShortestJobFirstPolicy(SchedulingPolicy):
+    """Строгий приоритет, внутри приоритета - сначала короткие задачи"""
+
+    name = "sjf"
+
+    def key(self, priority, duration, deadline, now):
+        return (priority, math.inf if duration is None else duration)
+
+
+class EarliestDeadlineFirstPolicy(SchedulingPolicy):
+    """Сначала задачи с ближайшим сроком; задачи без срока - после них, по приоритету"""
+
+    name = "edf"
+
+    def key(self, priority, duration, deadline, now):
+        return (math.inf if deadline is None else deadline, priority)
+
+
+class WeightedFairPolicy(SchedulingPolicy):
+    """
+    Взвешенная справедливая очередь (WFQ) по виртуальному времени
+
+    Каждый приоритет - отдельный класс с весом (по умолчанию 1 / приоритет).
+    Тег задачи = max(виртуальное время, тег предыдущей задачи класса) +
+    длительность / вес. Виртуальное время растет по мере выдачи задач, поэтому
+    давно ожидающие задачи низкого приоритета со временем получают самые
+    ранние теги относительно новых - это и есть старение против голодания.
+
+    Параметры:
+    weights (dict): вес по приоритету
+    default_duration (float): длительность для задач без оценки
+    """
+
+    name = "wfq"
+
+    def __init__(self, weights=None, default_duration=1.0):
+        self.weights = weights or {}
+        self.default_duration = default_duration
+        self.reset()
+
+    def reset(self):
+        self.virtual_time = 0.0
+        self.last_finish = {}
+
+    def key(self, priority, duration, deadline, now):
+        weight = self.weights.get(priority, 1 / max(priority, 1))
+        cost = self.default_duration if duration is None else duration
+        start = max(self.virtual_time, self.last_finish.get(priority, 0.0))
+        finish = start + cost / weight
+        self.last_finish[priority] = finish
+        return (finish, priority)
+
+    def on_dispatch(self, key):
+        self.virtual_time = max(self.virtual_time, key[0])
+
+
+SCHEDULING_POLICIES = {
+    policy.name: policy
+    for policy in (StrictPriorityPolicy, ShortestJobFirstPolicy, EarliestDeadlineFirstPolicy, WeightedFairPolicy)
+}
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивный предел числа одновременно выполняемых задач
+
+    Предел подстраивается по наблюдаемой задержке и ошибкам:
+    - 'aimd': +1/предел за каждую быструю успешную задачу (пока предел
+      используется хотя бы наполовину), умножение на backoff при ошибке или
+      задержке больше tolerance x минимальной;
+    - 'gradient': как Gradient из Netflix concurrency-limits - предел
+      умножается на tolerance x отношение минимальной задержки к текущей
+      (от 0.5 до 1) и получает запас sqrt(предел) на очередь, со сглаживанием.
+
+    Минимальная задержка берется по задачам того же приоритета, завершенным
+    за последние window секунд (как окно min-RTT в BBR), а если известна
+    ожидаемая длительность задачи, сравнивается задержка, деленная на нее. Иначе одна быстрая задача навсегда задала бы
+    базу, и задачи подольше постоянно снижали бы предел до min_limit.
+
+    У каждого приоритета может быть свой резерв слотов, которые не занимают
+    другие классы даже при снижении предела; сверх резерва классы делят
+    общую часть (предел минус все резервы). Поэтому задача приоритета 1 с
+    резервом никогда не ждет из-за фоновых задач.
+
+    Параметры:
+    initial_limit, min_limit, max_limit (int): начальный, минимальный и максимальный предел
+    algorithm (str): 'aimd' или 'gradient'
+    reserved (dict): число зарезервированных слотов по приоритету, например {1: 1}
+    tolerance (float): допустимый рост задержки относительно минимальной
+    backoff (float): множитель уменьшения предела
+    smoothing (float): сглаживание для 'gradient'
+    window (float): окно в секундах, по которому ищется минимальная задержка
+    """
+
+    def __init__(self, initial_limit=2, min_limit=1, max_limit=64, algorithm="aimd", reserved=None,
+                 tolerance=2.0, backoff=0.9, smoothing=0.2, window=10.0):
+        if algorithm not in ("aimd", "gradient"):
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+        self.reserved = reserved or {}
+        # Предел всегда оставляет хотя бы один слот вне резерва
+        self.min_limit = max(min_limit, sum(self.reserved.values()) + 1)
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, self.min_limit), max_limit))
+        self.algorithm = algorithm
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.in_flight_by_priority = {}
+        self.window = window
+        # Приоритет -> (время, задержка) с возрастающими задержками: голова - минимум окна
+        self.latencies = {}
+        self.stats = {"completed": 0, "errors": 0, "decreases": 0}
+
+    def _shared_in_use(self):
+        return sum(max(0, count - self.reserved.get(p, 0)) for p, count in self.in_flight_by_priority.items())
+
+    def can_admit(self, priority):
+        """Можно ли сейчас запустить задачу с приоритетом priority"""
+        if self.in_flight_by_priority.get(priority, 0) < self.reserved.get(priority, 0):
+            return True
+        return self._shared_in_use() < int(self.limit) - sum(self.reserved.values())
+
+    def on_start(self, priority):
+        self.in_flight += 1
+        self.in_flight_by_priority[priority] = self.in_flight_by_priority.get(priority, 0) + 1
+
+    def min_latency(self, priority):
+        """Минимальная задержка по окну приоритета (inf - замеров еще нет)"""
+        samples = self.latencies.get(priority)
+        if not samples:
+            return math.inf
+        horizon = time.monotonic() - self.window
+        while len(samples) > 1 and samples[0][0] < horizon:
+            samples.popleft()
+        return samples[0][1]
+
+    def on_complete(self, priority, latency, error=False, duration=None):
+        """
+        Учитывает завершение задачи и пересчитывает предел
+
+        Параметры:
+        priority (int): приоритет задачи, переданный в on_start
+        latency (float): время выполнения в секундах
+        error (bool): задача завершилась ошибкой
+        duration (float): ожидаемая длительность (None - неизвестна)
+        """
+        # Предел растет, только если общая часть используется хотя бы наполовину
+        utilized = self._shared_in_use() * 2 >= int(self.limit) - sum(self.reserved.values())
+        self.in_flight -= 1
+        self.in_flight_by_priority[priority] -= 1
+        self.stats["completed"] += 1
+        if error:
+            self.stats["errors"] += 1
+        if duration:
+            latency /= duration
+        # Задержки не меньше новой уже никогда не станут минимумом окна
+        samples = self.latencies.setdefault(priority, collections.deque())
+        while samples and samples[-1][1] >= latency:
+            samples.pop()
+        samples.append((time.monotonic(), latency))
+        min_latency = self.min_latency(priority)
+        if self.algorithm == "aimd":
+            if error or latency > self.tolerance * min_latency:
+                self.limit *= self.backoff
+                self.stats["decreases"] += 1
+            elif utilized:
+                self.limit += 1 / self.limit
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * min_latency / latency)) if latency > 0 else 1.0
+            if error:
+                gradient = min(gradient, self.backoff)
+            new_limit = self.limit * gradient + math.sqrt(self.limit)
+            if new_limit < self.limit:
+                self.stats["decreases"] += 1
+            self.limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+
+
+class PriorityScheduler:
+    """
+    Долгоживущий планировщик задач с приоритетами
+
+    Задачи хранятся в очереди с приоритетами на куче (heapq), их выполняет
+    пул рабочих корутин. Добавление задачи - O(log n) и возможно в любой
+    момент, в том числе во время работы: новая задача с высоким приоритетом
+    обгоняет ожидающие. Внутри одного приоритета задачи выбираются в порядке
+    добавления (номер в очереди). Порядок выдачи определяет политика
+    (SchedulingPolicy), по умолчанию - строгий приоритет.
+
+    Внутри хранится по куче на каждый приоритет; выдается лучшая по ключу
+    политики голова среди куч, что дает тот же порядок, что и одна общая куча.
+    С адаптивным ограничителем (AdaptiveLimiter) рабочих max_limit, а число
+    одновременно выполняемых задач определяет ограничитель: выдается лучшая
+    задача среди тех, что он допускает. Поэтому задача с зарезервированным
+    слотом не ждет, даже если по EDF или WFQ впереди стоит фоновая задача,
+    которой не хватает общей части предела.
+
+    Параметры:
+    workers (int): число одновременно выполняемых задач (без ограничителя)
+    trace (list): если передан, в него записываются (ключ, номер, имя)
+        в порядке выдачи задач рабочим
+    policy (SchedulingPolicy): политика планирования
+    limiter (AdaptiveLimiter): адаптивный предел вместо фиксированного workers
+    """
+
+    def __init__(self, workers=2, trace=None, policy=None, limiter=None):
+        self.workers = limiter.max_limit if limiter is not None else workers
+        self.trace = trace
+        self.policy = policy or StrictPriorityPolicy()
+        self.limiter = limiter
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "wait_time": 0.0}
+        self._heaps = {}  # приоритет -> куча (ключ, номер, задача)
+        self._counter = itertools.count()
+        self._waiters = collections.deque()
+        self._unfinished = 0
+        self._all_done = asyncio.Event()
+        self._all_done.set()
+        self._worker_tasks = []
+        self._stopping = False
+
+    def submit(self, coro_fn, *args, priority=0, name=None, duration=None, deadline=None):
+        """
+        Добавляет задачу в очередь
+
+        Параметры:
+        coro_fn (callable): асинхронная функция задачи
+        args: ее аргументы
+        priority (int): приоритет (меньше - важнее)
+        name (str): имя задачи для трассировки
+        duration (float): ожидаемая длительность в секундах (для SJF и WFQ)
+        deadline (float): срок завершения в секундах от момента добавления (для EDF)
+
+        Возвращает:
+        asyncio.Future: результат задачи
+        """
+        future = asyncio.get_running_loop().create_future()
+        now = time.perf_counter()
+        job = (coro_fn, args, future, name, now, priority, duration)
+        key = self.policy.key(priority, duration, None if deadline is None else now + deadline, now)
+        heapq.heappush(self._heaps.setdefault(priority, []), (key, next(self._counter), job))
+        self.stats["submitted"] += 1
+        self._unfinished += 1
+        self._all_done.clear()
+        self._wake_one()
+        return future
+
+    def start(self):
+        """Запускает рабочие корутины (вызывать внутри работающего цикла событий)"""
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    def _wake_one(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _select(self):
+        """Приоритет, из кучи которого выдать задачу (None - выдать нечего)"""
+        best = None
+        for priority, heap in self._heaps.items():
+            if best is not None and heap[0] >= self._heaps[best][0]:
+                continue
+            if self.limiter is None or self.limiter.can_admit(priority):
+                best = priority
+        return best
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while (selected := self._select()) is None:
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+                await waiter
+            heap = self._heaps[selected]
+            key, seq, job = heapq.heappop(heap)
+            if not heap:
+                del self._heaps[selected]
+            coro_fn, args, future, name, submitted, priority, duration = job
+            self.policy.on_dispatch(key)
+            if self.trace is not None:
+                self.trace.append((key, seq, name))
+            started = time.perf_counter()
+            self.stats["wait_time"] += started - submitted
+            if self.limiter is not None:
+                self.limiter.on_start(priority)
+            if self._select() is not None:
+                self._wake_one()  # предел мог вырасти - будим следующего рабочего
+            error = False
+            try:
+                if not future.cancelled():
+                    result = await coro_fn(*args)
+                    if not future.cancelled():
+                        future.set_result(result)
+                    self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                # Отмена самой задачи не должна уносить рабочего; при остановке
+                # планировщика отменяется и задача, и рабочий
+                error = True
+                self.stats["failed"] += 1
+                future.cancel()
+                if self._stopping:
+                    raise
+            except Exception as e:
+                error = True
+                self.stats["failed"] += 1
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                if self.limiter is not None:
+                    self.limiter.on_complete(priority, time.perf_counter() - started, error, duration)
+                    self._wake_one()
+                self._unfinished -= 1
+                if self._unfinished == 0:
+                    self._all_done.set()
+
+    def pending(self):
+        """Число задач, ожидающих выполнения"""
+        return sum(len(heap) for heap in self._heaps.values())
+
+    async def join(self):
+        """Ждет, пока очередь опустеет и все выданные задачи завершатся"""
+        await self._all_done.wait()
+
+    async def shutdown(self, wait=True):
+        """
+        Останавливает рабочих; при wait=True сначала дожидается всех задач,
+        иначе выполняющиеся и ожидающие задачи отменяются (их futures - тоже)
+        """
+        if wait:
+            await self.join()
+        self._stopping = True
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._stopping = False
+        for heap in self._heaps.values():
+            for _, _, job in heap:
+                job[2].cancel()
+        self._heaps = {}
+        self._unfinished = 0
+        self._all_done.set()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.shutdown(wait=exc_type is None)
+
+
+def percentile(values, q):
+    """Процентиль q (0-100) по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def simulate_schedule(trace, policy, workers=2):
+    """
+    Проигрывает трассу задач на виртуальных часах без реального ожидания
+
+    Параметры:
+    trace (list): кортежи (имя, приоритет, длительность, момент поступления,
+        срок от момента поступления или None)
+    policy (SchedulingPolicy): политика планирования (сбрасывается перед прогоном)
+    workers (int): число одновременно выполняемых задач
+
+    Возвращает:
+    dict: makespan, среднее и p99 время завершения (от поступления),
+        число пропущенных сроков и порядок завершения
+    """
+    policy.reset()
+    arrivals = sorted(enumerate(trace), key=lambda item: (item[1][3], item[0]))
+    ready = []
+    running = []  # куча (момент завершения, номер, задача)
+    counter = itertools.count()
+    completion_times = []
+    completion_order = []
+    misses = 0
+    now = 0.0
+    next_arrival = 0
+
+    while next_arrival < len(arrivals) or ready or running:
+        while next_arrival < len(arrivals) and arrivals[next_arrival][1][3] <= now:
+            _, task = arrivals[next_arrival]
+            name, priority, duration, arrival, deadline = task
+            absolute_deadline = None if deadline is None else arrival + deadline
+            heapq.heappush(ready, (policy.key(priority, duration, absolute_deadline, now), next(counter), task))
+            next_arrival += 1
+
+        if ready and len(running) < workers:
+            key, _, task = heapq.heappop(ready)
+            policy.on_dispatch(key)
+            heapq.heappush(running, (now + task[2], next(counter), task))
+            continue
+
+        # Переход к следующему событию: завершению задачи или поступлению новой
+        candidates = []
+        if running:
+            candidates.append(running[0][0])
+        if next_arrival < len(arrivals):
+            candidates.append(arrivals[next_arrival][1][3])
+        now = min(candidates)
+        while running and running[0][0] <= now:
+            finish, _, task = heapq.heappop(running)
+            name, priority, duration, arrival, deadline = task
+            completion_times.append(finish - arrival)
+            completion_order.append(name)
+            if deadline is not None and finish > arrival + deadline:
+                misses += 1
+
+    return {
+        "makespan": now,
+        "mean_completion": sum(completion_times) / len(completion_times) if completion_times else 0.0,
+        "p99_completion": percentile(completion_times, 99),
+        "deadline_misses": misses,
+        "completion_order": completion_order,
+    }
+
+
+def make_task_trace(count=10000, workers=2, load=0.9, priorities=4, seed=42):
+    """
+    Синтетическая трасса: пуассоновские поступления с заданной загрузкой,
+    длительности с тяжелым хвостом (Парето), срок - от 2 до 10 длительностей
+    """
+    rng = random.Random(seed)
+    alpha = 1.5
+    mean_duration = 1.0
+    arrival = 0.0
+    trace = []
+    for i in range(count):
+        arrival += rng.expovariate(workers * load / mean_duration)
+        duration = rng.paretovariate(alpha) * mean_duration * (alpha - 1) / alpha
+        priority = rng.randint(1, priorities)
+        deadline = duration * rng.uniform(2, 10)
+        trace.append((f"T{i}", priority, duration, arrival, deadline))
+    return trace
+
+
+def compare_policies(trace, workers=2, policies=None):
+    """
+    Сравнивает политики планирования на одной трассе в режиме симуляции
+
+    Возвращает:
+    dict: имя политики -> результат simulate_schedule
+    """
+    policies = policies or [policy_class() for policy_class in SCHEDULING_POLICIES.values()]
+    print(f"{'Политика':<10} {'Makespan':>10} {'Среднее':>10} {'p99':>10} {'Пропуски':>9} {'Время':>8}")
+    report = {}
+    for policy in policies:
+        start = time.perf_counter()
+        result = simulate_schedule(trace, policy, workers)
+        elapsed = time.perf_counter() - start
+        print(f"{policy.name:<10} {result['makespan']:>10.2f} {result['mean_completion']:>10.2f} "
+              f"{result['p99_completion']:>10.2f} {result['deadline_misses']:>9} {elapsed * 1000:>6.0f}мс")
+        report[policy.name] = result
+    return report
+
+
+async def noop_task():
+    """Пустая задача для замера накладных расходов планировщика"""
+    return None
+
+
+async def verify_dynamic_submission():
+    """
+    Проверяет, что задача, добавленная во время работы, обгоняет ожидающие
+    задачи с более низким приоритетом
+
+    Возвращает:
+    list: имена задач в порядке выдачи
+    """
+    trace = []
+    async with PriorityScheduler(workers=1, trace=trace) as scheduler:
+        scheduler.submit(asyncio.sleep, 0.05, priority=3, name="A")
+        scheduler.submit(asyncio.sleep, 0, priority=3, name="B")
+        scheduler.submit(asyncio.sleep, 0, priority=4, name="C")
+        await asyncio.sleep(0.01)  # A уже выполняется, B и C ждут
+        scheduler.submit(asyncio.sleep, 0, priority=1, name="Срочная")
+    return [name for _, _, name in trace]
+
+
+async def benchmark_scheduler(count=100000, worker_counts=(1, 8, 64), priorities=5, seed=42):
+    """
+    Накладные расходы планировщика на задачу и проверка порядка выдачи
+
+    Все задачи добавляются до запуска рабочих, поэтому порядок выдачи
+    обязан совпасть с сортировкой по (приоритет, номер добавления).
+    Для сравнения - исходная схема: asyncio.Semaphore и gather.
+    """
+    print(f"\n=== БЕНЧМАРК ПЛАНИРОВЩИКА ({count} задач, {priorities} приоритетов) ===")
+    rng = random.Random(seed)
+    task_priorities = [rng.randint(1, priorities) for _ in range(count)]
+    print(f"{'Схема':<22} {'Раб.':>5} {'Добавление':>11} {'Всего':>8} {'мкс/зад.':>9} {'Порядок':>8}")
+    report = []
+    for workers in worker_counts:
+        trace = []
+        scheduler = PriorityScheduler(workers=workers, trace=trace)
+        start = time.perf_counter()
+        for priority in task_priorities:
+            scheduler.submit(noop_task, priority=priority)
+        submitted = time.perf_counter() - start
+        scheduler.start()
+        await scheduler.shutdown()
+        elapsed = time.perf_counter() - start
+        ordered = trace == sorted(trace) and len(trace) == count
+        print(f"{'Куча + рабочие':<22} {workers:>5} {submitted:>10.3f}с {elapsed:>7.3f}с "
+              f"{elapsed / count * 1e6:>9.2f} {'да' if ordered else 'нет':>8}")
+        report.append({"scheme": "heap", "workers": workers, "submit_time": submitted,
+                       "total_time": elapsed, "ordered": ordered})
+
+        semaphore = asyncio.Semaphore(workers)
+        start_order = []
+
+        async def execute(index):
+            async with semaphore:
+                start_order.append(index)
+                await noop_task()
+
+        order = sorted(range(count), key=lambda i: task_priorities[i])
+        start = time.perf_counter()
+        await asyncio.gather(*(execute(i) for i in order))
+        elapsed = time.perf_counter() - start
+        ordered = start_order == order
+        print(f"{'Семафор + gather':<22} {workers:>5} {'-':>11} {elapsed:>7.3f}с "
+              f"{elapsed / count * 1e6:>9.2f} {'да' if ordered else 'нет':>8}")
+        report.append({"scheme": "semaphore", "workers": workers, "total_time": elapsed, "ordered": ordered})
+
+    dynamic = await verify_dynamic_submission()
+    print(f"Добавление во время работы: порядок выдачи {dynamic}")
+    return report
+
+
+class SimulatedBackend:
+    """
+    Локальная имитация нижестоящей системы с «коленом» задержки
+
+    До capacity одновременных запросов задержка равна base_latency, выше -
+    растет пропорционально нагрузке (запросы встают в очередь), поэтому
+    пропускная способность упирается в capacity / base_latency. Свыше
+    overload одновременных запросов часть запросов завершается ошибкой.
+    """
+
+    def __init__(self, capacity=8, base_latency=0.01, overload=24, seed=42):
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.overload = overload
+        self.in_flight = 0
+        self.rng = random.Random(seed)
+
+    async def call(self):
+        self.in_flight += 1
+        try:
+            load = self.in_flight
+            await asyncio.sleep(self.base_latency * max(1.0, load / self.capacity))
+            if load > self.overload and self.rng.random() < (load - self.overload) / load:
+                raise RuntimeError("Перегрузка бэкенда")
+            return load
+        finally:
+            self.in_flight -= 1
+
+
+async def _run_limiter_scenario(limiter, workers, background, urgent, urgent_interval):
+    backend = SimulatedBackend()
+    scheduler = PriorityScheduler(workers=workers, limiter=limiter)
+    latencies = []
+    urgent_waits = []
+    errors = 0
+
+    async def job():
+        start = time.perf_counter()
+        await backend.call()
+        latencies.append(time.perf_counter() - start)
+
+    async def urgent_job(submitted):
+        urgent_waits.append(time.perf_counter() - submitted)
+        await job()
+
+    start = time.perf_counter()
+    scheduler.start()
+    futures = [scheduler.submit(job, priority=4) for _ in range(background)]
+    for _ in range(urgent):
+        await asyncio.sleep(urgent_interval)
+        futures.append(scheduler.submit(urgent_job, time.perf_counter(), priority=1))
+    await scheduler.shutdown()
+    elapsed = time.perf_counter() - start
+    for future in futures:
+        if future.exception() is not None:
+            errors += 1
+    return {
+        "throughput": len(futures) / elapsed,
+        "p50_latency": percentile(latencies, 50),
+        "p99_latency": percentile(latencies, 99),
+        "errors": errors,
+        "urgent_p99_wait": percentile(urgent_waits, 99),
+        "final_limit": limiter.limit if limiter is not None else workers,
+    }
+
+
+async def benchmark_adaptive_limit(background=3000, urgent=50, urgent_interval=0.02):
+    """
+    Фиксированный предел против адаптивного на имитации бэкенда с коленом
+    задержки (8 одновременных запросов по 10 мс): пропускная способность,
+    задержка запросов к бэкенду, ошибки и ожидание срочных задач
+    (приоритет 1), поступающих на фоне очереди фоновых задач (приоритет 4)
+    """
+    print(f"\n=== БЕНЧМАРК АДАПТИВНОГО ПРЕДЕЛА ({background} фоновых + {urgent} срочных задач) ===")
+    scenarios = [
+        ("Фиксированный 2", lambda: None, 2),
+        ("Фиксированный 8", lambda: None, 8),
+        ("Фиксированный 32", lambda: None, 32),
+        ("AIMD", lambda: AdaptiveLimiter(algorithm="aimd"), None),
+        ("AIMD + резерв", lambda: AdaptiveLimiter(algorithm="aimd", reserved={1: 1}), None),
+        ("Градиент + резерв", lambda: AdaptiveLimiter(algorithm="gradient", reserved={1: 1},
+                                                      tolerance=1.5), None),
+    ]
+    print(f"{'Предел':<20} {'Задач/с':>8} {'p50 мс':>7} {'p99 мс':>7} {'Ошибки':>7} "
+          f"{'p99 ожид. срочных мс':>21} {'Итог. предел':>13}")
+    report = {}
+    for label, make_limiter, workers in scenarios:
+        result = await _run_limiter_scenario(make_limiter(), workers, background, urgent, urgent_interval)
+        print(f"{label:<20} {result['throughput']:>8.0f} {result['p50_latency'] * 1000:>7.1f} "
+              f"{result['p99_latency'] * 1000:>7.1f} {result['errors']:>7} "
+              f"{result['urgent_p99_wait'] * 1000:>21.1f} {result['final_limit']:>13.1f}")
+        report[label] = result
+    return report
+
+
+class DurableTaskQueue:
+    """
+    Долговременная очередь задач в SQLite (режим WAL)
+
+    Задача хранится как имя обработчика, аргументы (JSON), приоритет и
+    необязательные ожидаемая длительность и срок (для политик SJF, WFQ и EDF).
+    Добавления и подтверждения буферизуются и фиксируются пакетами по
+    batch_size в одной транзакции (групповая фиксация): одна синхронизация
+    с диском на пакет, а не на задачу. Выданные задачи помечаются как
+    занятые; при открытии очереди после сбоя занятые, но не подтвержденные
+    задачи снова становятся готовыми - доставка «хотя бы один раз»; задачи,
+    исчерпавшие max_attempts попыток, вместо этого помечаются мертвыми.
+    Транзакция, прерванная ошибкой, откатывается, а буферы сохраняются до
+    успешной фиксации. Очередью владеет один процесс.
+
+    Параметры:
+    path (str): путь к файлу базы
+    batch_size (int): размер пакета групповой фиксации (1 - фиксация на каждую задачу)
+    synchronous (str): PRAGMA synchronous: 'FULL' - фиксация переживает сбой
+        питания, 'OFF' - без синхронизации с диском
+    max_attempts (int): после стольких неудачных попыток задача помечается мертвой
+    """
+
+    READY, LEASED, DEAD = 0, 1, 2
+
+    def __init__(self, path, batch_size=256, synchronous="FULL", max_attempts=3):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, handler TEXT NOT NULL, "
+            "args TEXT NOT NULL, state INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Базы, созданные до появления длительности и срока, дополняются столбцами
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column in ("duration", "deadline"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (state, priority, id)")
+        self._puts = []
+        self._acks = []
+        self._nacks = []
+        self.stats = {"commits": 0, "redelivered": 0, "dead": 0}
+        self._recover()
+
+    def _transaction(self, begin, work):
+        """Выполняет work() в транзакции; при любой ошибке откатывает ее и пробрасывает ошибку"""
+        self._conn.execute(begin)
+        try:
+            result = work()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _recover(self):
+        """
+        Возвращает в очередь задачи, выданные до сбоя и не подтвержденные;
+        исчерпавшие попытки помечаются мертвыми, как в nack
+        """
+        def work():
+            dead = self._conn.execute(
+                "UPDATE tasks SET state = ? WHERE state = ? AND attempts >= ?",
+                (self.DEAD, self.LEASED, self.max_attempts),
+            ).rowcount
+            ready = self._conn.execute("UPDATE tasks SET state = ? WHERE state = ?",
+                                       (self.READY, self.LEASED)).rowcount
+            return dead, ready
+
+        self.stats["dead"], self.stats["redelivered"] = self._transaction("BEGIN IMMEDIATE", work)
+
+    def put(self, handler, args=(), priority=0, duration=None, deadline=None):
+        """
+        Добавляет задачу (надежно сохранена после ближайшей фиксации пакета)
+
+        Параметры:
+        duration (float): ожидаемая длительность в секундах (для SJF и WFQ)
+        deadline (float): срок в секундах от момента добавления (для EDF); хранится
+            как абсолютное время, поэтому переживает перезапуск
+        """
+        absolute_deadline = None if deadline is None else time.time() + deadline
+        self._puts.append((priority, handler, json.dumps(list(args)), duration, absolute_deadline))
+        if len(self._puts) >= self.batch_size:
+            self.flush()
+
+    def ack(self, task_id):
+        """Подтверждает выполнение задачи"""
+        self._acks.append((task_id,))
+        if len(self._acks) >= self.batch_size:
+            self.flush()
+
+    def nack(self, task_id):
+        """Возвращает неудавшуюся задачу в очередь (или помечает мертвой после max_attempts попыток)"""
+        self._nacks.append((self.max_attempts, self.DEAD, self.READY, task_id))
+        if len(self._nacks) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Фиксирует буферизованные добавления и подтверждения одной транзакцией"""
+        if not (self._puts or self._acks or self._nacks):
+            return
+
+        def work():
+            self._conn.executemany(
+                "INSERT INTO tasks (priority, handler, args, duration, deadline) VALUES (?, ?, ?, ?, ?)",
+                self._puts,
+            )
+            self._conn.executemany("DELETE FROM tasks WHERE id = ?", self._acks)
+            self._conn.executemany(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END WHERE id = ?", self._nacks
+            )
+
+        self._transaction("BEGIN", work)
+        self.stats["commits"] += 1
+        self._puts, self._acks, self._nacks = [], [], []
+
+    def take(self, limit):
+        """
+        Выдает до limit готовых задач в порядке (приоритет, порядок добавления)
+        и помечает их занятыми
+
+        Возвращает:
+        list: кортежи (id, приоритет, обработчик, аргументы, номер попытки,
+            длительность, оставшееся до срока время в секундах); длительность
+            и срок - None, если не заданы
+        """
+        self.flush()
+
+        def work():
+            rows = self._conn.execute(
+                "SELECT id, priority, handler, args, attempts, duration, deadline FROM tasks WHERE state = ? "
+                "ORDER BY priority, id LIMIT ?", (self.READY, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE tasks SET state = ?, attempts = attempts + 1 WHERE id = ?",
+                [(self.LEASED, row[0]) for row in rows],
+            )
+            return rows
+
+        rows = self._transaction("BEGIN IMMEDIATE", work)
+        self.stats["commits"] += 1
+        now = time.time()
+        return [(task_id, priority, handler, json.loads(args), attempts + 1, duration,
+                 None if deadline is None else deadline - now)
+                for task_id, priority, handler, args, attempts, duration, deadline in rows]
+
+    def count(self, state=READY):
+        """
+        Число задач в состоянии state (None - во всех состояниях) с учетом
+        еще не зафиксированных добавлений
+        """
+        if state is None:
+            row = self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        else:
+            row = self._conn.execute("SELECT COUNT(*) FROM tasks WHERE state = ?", (state,)).fetchone()
+        return row[0] + (len(self._puts) if state in (None, self.READY) else 0)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+async def drain_durable_queue(task_queue, handlers, workers=2, prefetch=None, flush_interval=0.05,
+                              policy=None, limiter=None):
+    """
+    Выполняет задачи из долговременной очереди планировщиком PriorityScheduler
+
+    В памяти держится не больше prefetch выданных задач; как только их
+    становится меньше половины, очередь пополняется из базы, не дожидаясь
+    завершения остальных. Поэтому рабочие не простаивают, а задача с высоким
+    приоритетом, добавленная в базу во время работы, попадает в планировщик
+    при ближайшем пополнении и обгоняет уже выданные. Успешные задачи
+    подтверждаются, неудачные возвращаются в очередь. Подтверждения,
+    накопленные за flush_interval, фиксируются одной транзакцией (или раньше,
+    если набрался пакет очереди), поэтому при сбое повторно выполнятся только
+    задачи последнего окна.
+
+    Параметры:
+    task_queue (DurableTaskQueue): очередь
+    handlers (dict): имя обработчика -> асинхронная функция
+    prefetch (int): сколько задач держать выданными (по умолчанию 4 * workers)
+    flush_interval (float): окно групповой фиксации подтверждений в секундах
+    workers, policy, limiter: параметры PriorityScheduler
+
+    Возвращает:
+    dict: id задачи -> результат
+    """
+    loop = asyncio.get_running_loop()
+    prefetch = prefetch or 4 * (limiter.max_limit if limiter is not None else workers)
+    results = {}
+    outstanding = 0
+    refill = asyncio.Event()
+    flush_handle = None
+
+    def flush():
+        nonlocal flush_handle
+        flush_handle = None
+        task_queue.flush()
+
+    def on_done(task_id, future):
+        nonlocal flush_handle, outstanding
+        if future.cancelled() or future.exception() is not None:
+            task_queue.nack(task_id)
+        else:
+            results[task_id] = future.result()
+            task_queue.ack(task_id)
+        outstanding -= 1
+        if outstanding <= prefetch // 2:
+            refill.set()
+        if flush_handle is None:
+            flush_handle = loop.call_later(flush_interval, flush)
+
+    async with PriorityScheduler(workers=workers, policy=policy, limiter=limiter) as scheduler:
+        while True:
+            refill.clear()
+            tasks = task_queue.take(prefetch - outstanding)
+            for task_id, priority, handler, args, _, duration, deadline in tasks:
+                future = scheduler.submit(handlers[handler], *args, priority=priority, name=str(task_id),
+                                          duration=duration, deadline=deadline)
+                future.add_done_callback(lambda f, task_id=task_id: on_done(task_id, f))
+            outstanding += len(tasks)
+            if outstanding == 0:
+                break  # в базе нет готовых задач и все выданные завершены
+            await refill.wait()
+        await scheduler.join()
+    if flush_handle is not None:
+        flush_handle.cancel()
+    task_queue.flush()
+    return results
+
+
+def _crash_after_partial_work(path, total, taken, acked):
+    """Процесс, который добавляет задачи, часть выполняет и «падает» без штатного завершения"""
+    task_queue = DurableTaskQueue(path, batch_size=total)
+    for i in range(total):
+        task_queue.put("noop", (i,), priority=i % 4)
+    task_queue.flush()
+    leased = task_queue.take(taken)
+    for task_id, *_ in leased[:acked]:
+        task_queue.ack(task_id)
+    task_queue.flush()
+    for task_id, *_ in leased[acked:]:
+        task_queue.ack(task_id)  # эти подтверждения остаются в буфере и теряются при сбое
+    os._exit(1)
+
+
+def verify_crash_recovery(total=100, taken=10, acked=5):
+    """
+    Проверяет доставку «хотя бы один раз»: после аварийного завершения
+    процесса выданные, но не подтвержденные задачи доставляются снова
+
+    Возвращает:
+    dict: число оставшихся задач, повторно доставленных и их номера попыток
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "queue.db")
+        process = multiprocessing.Process(target=_crash_after_partial_work, args=(path, total, taken, acked))
+        process.start()
+        process.join()
+        task_queue = DurableTaskQueue(path)
+        remaining = task_queue.count()
+        redelivered = task_queue.stats["redelivered"]
+        attempts = sorted({task[4] for task in task_queue.take(total) if task[4] > 1})
+        task_queue.close()
+    ok = remaining == total - acked and redelivered == taken - acked and attempts == [2]
+    print(f"Восстановление после сбоя: осталось {remaining} из {total}, "
+          f"повторно доставлено {redelivered} (ожидалось {taken - acked}) - {'OK' if ok else 'ОШИБКА'}")
+    return {"remaining": remaining, "redelivered": redelivered, "attempts": attempts, "ok": ok}
+
+
+def benchmark_durable_queue(count=20000, batch_size=256):
+    """
+    Пропускная способность добавления и выдачи с подтверждением:
+    куча в памяти против SQLite с фиксацией на каждую задачу, с групповой
+    фиксацией и без синхронизации с диском
+    """
+    print(f"\n=== БЕНЧМАРК ДОЛГОВРЕМЕННОЙ ОЧЕРЕДИ ({count} задач, пакет {batch_size}) ===")
+    print(f"{'Хранилище':<34} {'Задач':>7} {'Добавление/с':>13} {'Выдача+подтв./с':>16} {'Фиксаций':>9}")
+    report = []
+
+    heap = []
+    start = time.perf_counter()
+    for i in range(count):
+        heapq.heappush(heap, (i % 4, i, ("noop", (i,))))
+    put_rate = count / (time.perf_counter() - start)
+    start = time.perf_counter()
+    while heap:
+        heapq.heappop(heap)
+    take_rate = count / (time.perf_counter() - start)
+    print(f"{'Куча в памяти':<34} {count:>7} {put_rate:>13.0f} {take_rate:>16.0f} {'-':>9}")
+    report.append({"backend": "memory", "tasks": count, "put_rate": put_rate, "take_rate": take_rate})
+
+    modes = [
+        ("SQLite, фиксация на задачу", 1, "FULL", max(1, count // 20)),
+        ("SQLite, групповая фиксация", batch_size, "FULL", count),
+        ("SQLite, без синхронизации (OFF)", batch_size, "OFF", count),
+    ]
+    for label, mode_batch, synchronous, n in modes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            task_queue = DurableTaskQueue(os.path.join(tmp_dir, "queue.db"), batch_size=mode_batch,
+                                          synchronous=synchronous)
+            start = time.perf_counter()
+            for i in range(n):
+                task_queue.put("noop", (i,), priority=i % 4)
+            task_queue.flush()
+            put_rate = n / (time.perf_counter() - start)
+            start = time.perf_counter()
+            while True:
+                tasks = task_queue.take(batch_size)
+                if not tasks:
+                    break
+                for task_id, *_ in tasks:
+                    task_queue.ack(task_id)
+            task_queue.flush()
+            take_rate = n / (time.perf_counter() - start)
+            commits = task_queue.stats["commits"]
+            task_queue.close()
+        print(f"{label:<34} {n:>7} {put_rate:>13.0f} {take_rate:>16.0f} {commits:>9}")
+        report.append({"backend": label, "tasks": n, "put_rate": put_rate, "take_rate": take_rate,
+                       "commits": commits})
+
+    verify_crash_recovery()
+    return report
+
+
+async def task6_async_scheduler(policy=None, limiter=None, durable_path=None):
     """
     Задача: Создайте асинхронный планировщик задач.
 
@@ -35,6 +1045,12 @@ async def task6_async_scheduler():
     - Обеспечить выполнение высокоприоритетных задач первыми
     - Реализовать ограничение на одновременное выполнение (не более 2 задач)
     - Вывести порядок завершения задач
+
+    Параметры:
+    policy (SchedulingPolicy): политика планирования (по умолчанию - строгий приоритет)
+    limiter (AdaptiveLimiter): адаптивный предел вместо фиксированных 2 задач
+    durable_path (str): файл долговременной очереди; если задан, задачи
+        переживают перезапуск процесса - после сбоя выполняются оставшиеся
     """
     tasks_with_priority = [
         ("Экстренная задача", 1, 1),
@@ -66,26 +1082,37 @@ async def task6_async_scheduler():
         print(f"{i}. {name} (приоритет {priority}, длительность {duration} сек)")
     print()
 
-    # Создаем семафор для ограничения одновременного выполнения
-    semaphore = asyncio.Semaphore(2)
-    results = []
+    # Планировщик: куча с приоритетами и 2 рабочие корутины, порядок внутри
+    # одного приоритета - порядок добавления
     completion_order = []
 
-    # Асинхронная функция для выполнения одной задачи
     async def execute_task(name, priority, duration):
-        async with semaphore:  # Ограничиваем одновременное выполнение
-            result = await scheduled_task(name, priority, duration)
-            completion_order.append(name)
-            return result
+        result = await scheduled_task(name, priority, duration)
+        completion_order.append(name)
+        return result
 
-    # Создаем задачи
-    tasks = []
-    for name, priority, duration in sorted_tasks:
-        task = execute_task(name, priority, duration)
-        tasks.append(task)
-
-    # Запускаем все задачи и собираем результаты
-    results = await asyncio.gather(*tasks)
+    if durable_path is not None:
+        task_queue = DurableTaskQueue(durable_path)
+        # Заполняем только пустую базу: мертвые или выданные записи тоже
+        # означают, что задачи уже были поставлены
+        if task_queue.count(state=None) == 0:
+            for name, priority, duration in sorted_tasks:
+                task_queue.put("execute_task", (name, priority, duration), priority=priority,
+                               duration=duration)
+        else:
+            print(f"Продолжение после перезапуска: в очереди {task_queue.count()} задач")
+        results_by_id = await drain_durable_queue(task_queue, {"execute_task": execute_task},
+                                                  workers=2, policy=policy, limiter=limiter)
+        task_queue.close()
+        results = [results_by_id[task_id] for task_id in sorted(results_by_id)]
+    else:
+        async with PriorityScheduler(workers=2, policy=policy, limiter=limiter) as scheduler:
+            futures = [
+                scheduler.submit(execute_task, name, priority, duration,
+                                 priority=priority, name=name, duration=duration)
+                for name, priority, duration in sorted_tasks
+            ]
+        results = [future.result() for future in futures]
 
     end_time = time.time()
     total_time = end_time - start_time
@@ -123,6 +1150,10 @@ async def task6_async_scheduler():
         for name, duration in tasks_list:
             print(f"  - {name} ({duration} сек)")
 
+    # Симуляция тех же задач на виртуальных часах для всех политик
+    print("\nСравнение политик планирования (симуляция, 2 задачи одновременно):")
+    compare_policies([(name, priority, duration, 0.0, None) for name, priority, duration in tasks_with_priority])
+
     print("\nВыводы:")
     print("1. Задачи с высшим приоритетом выполняются первыми")
     print("2. Ограничение в 2 одновременные задачи:")
@@ -141,6 +1172,11 @@ async def main():
     try:
         results = await task6_async_scheduler()
         print(f"\nРезультаты выполнения: {results}")
+        await benchmark_scheduler()
+        print("\n=== СРАВНЕНИЕ ПОЛИТИК НА СИНТЕТИЧЕСКОЙ ТРАССЕ (10000 задач, загрузка 0.9) ===")
+        compare_policies(make_task_trace())
+        await benchmark_adaptive_limit()
+        benchmark_durable_queue()
     except Exception as e:
         print(f"Произошла ошибка: {e}")
 